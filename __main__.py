@@ -1,12 +1,26 @@
 import os
 import csv
+import json
+import socket
 from time import sleep
 
 from dotenv import load_dotenv
 
 from libs.factory_scraper import FactoryScraper
+from libs.factory_api_client import FactoryApiClient
 from libs.discord_chat_reader import DiscordChatReader
+from libs.order_pipeline import OrderPipeline
+from libs.message_sources import GatewayMessageSource
 from libs.web_scraping import WebScraping
+from libs.order_ledger import OrderLedger
+from libs.debug_capture import DebugCapture
+from libs.latency_tracker import latency
+from libs.browser_pool import BrowserPool
+from libs.chrome_profile import build_profile, get_debug_port
+from libs.memory_governor import MemoryGovernor
+from libs.claim_store import get_claim_store
+from libs.order_coordinator import OrderCoordinator
+from selenium.common.exceptions import WebDriverException
 
 # Read keywords from csv
 KEYWORDS = []
@@ -23,35 +37,217 @@ load_dotenv()
 HEADLESS = os.getenv("SHOW_BROWSER") != "True"
 USERNAME = os.getenv("USERNAME_SCRAPER")
 PASSWORD = os.getenv("PASSWORD")
+FACTORY_ACCEPT_MODE = os.getenv("FACTORY_ACCEPT_MODE", "selenium")
+FACTORY_API_ORDERS_URL = os.getenv("FACTORY_API_ORDERS_URL")
+FACTORY_API_ACCEPT_URL = os.getenv("FACTORY_API_ACCEPT_URL")
+DEBUG_CAPTURE_MODE = os.getenv("DEBUG_CAPTURE_MODE", "failure")
 DISCORD_CHANNELS_NAMES = os.getenv("DISCORD_CHANNELS_NAMES").split(",")
 DISCORD_SERVER_LINK = os.getenv("DISCORD_SERVER_LINK")
+DISCORD_PUSH_MODE = os.getenv("DISCORD_PUSH_MODE") == "True"
+DISCORD_PUSH_WAIT = float(os.getenv("DISCORD_PUSH_WAIT", 5))
+DISCORD_POLL_WAIT = float(os.getenv("DISCORD_POLL_WAIT", 1))
+DISCORD_PARALLEL_MODE = os.getenv("DISCORD_PARALLEL_MODE") == "True"
+DISCORD_KEEP_TAB_OPEN = os.getenv("DISCORD_KEEP_TAB_OPEN") == "True"
+DISCORD_MESSAGE_SOURCE = os.getenv("DISCORD_MESSAGE_SOURCE", "dom")
+PIPELINE_MODE = os.getenv("PIPELINE_MODE") == "True"
+LATENCY_JSONL = os.getenv("LATENCY_JSONL", "latency.jsonl")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+BROWSER_POOL = os.getenv("BROWSER_POOL") == "True"
+STANDBY_CHROME_FOLDER = os.getenv("STANDBY_CHROME_FOLDER", "")
+FAST_START = os.getenv("FAST_START") == "True"
+FAST_START_PROFILE = os.getenv("FAST_START_PROFILE", "chrome_profile")
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+CHROME_DEBUG_ADDRESS = os.getenv("CHROME_DEBUG_ADDRESS", "")
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES") == "True"
+CDP_SCRIPTS = os.getenv("CDP_SCRIPTS") == "True"
+CHROME_FOLDER = os.getenv("CHROME_FOLDER", "")
+INSTANCE_NAME = os.getenv("INSTANCE_NAME", "")
+PROFILES_FOLDER = os.getenv("PROFILES_FOLDER", "profiles")
+BOT_ROLE = os.getenv("BOT_ROLE", "single")
+CLAIM_STORE_URL = os.getenv("CLAIM_STORE_URL", "claims.db")
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))
+SHARDS_COUNT = int(os.getenv("SHARDS_COUNT", 1))
+DISCORD_MAX_HEAP_MB = float(os.getenv("DISCORD_MAX_HEAP_MB", 0))
+DISCORD_MAX_DOM_NODES = int(os.getenv("DISCORD_MAX_DOM_NODES", 30000))
+DISCORD_KEEP_MESSAGES = int(os.getenv("DISCORD_KEEP_MESSAGES", 50))
+
+# Read requests to block by site
+BLOCK_RULES = {}
+if BLOCK_RESOURCES:
+    block_rules_path = os.path.join(current_folder, "block_rules.json")
+    with open(block_rules_path, "r") as file:
+        BLOCK_RULES = json.load(file)
 
 if __name__ == "__main__":
     
+    # Export stages latencies
+    latency.start(jsonl_path=LATENCY_JSONL, port=METRICS_PORT)
+    
     print("Starting chrome...")
     
-    # Get windows username
-    username = os.getlogin()
-    chrome_data_folder = f"C:\\Users\\{username}\\AppData"
-    chrome_data_folder += "\\Local\\Google\\Chrome\\User Data"
+    # User's chrome data (default folder of the system if it's not set)
+    chrome_data_folder = CHROME_FOLDER
+    if not chrome_data_folder and os.name == "nt":
+        chrome_data_folder = os.path.join(
+            os.getenv("LOCALAPPDATA", ""), "Google", "Chrome", "User Data"
+        )
+    elif not chrome_data_folder:
+        chrome_data_folder = os.path.expanduser("~/.config/google-chrome")
+    user_chrome_folder = chrome_data_folder
+    
+    # Instance profile: clone of the login data, with its own debugging port
+    # (only the chrome processes of the profile are killed)
+    if INSTANCE_NAME:
+        chrome_data_folder = build_profile(
+            user_chrome_folder, os.path.join(PROFILES_FOLDER, INSTANCE_NAME)
+        )
+    
+    # Fast start: small profile, cached driver and reattach to running chrome
+    elif FAST_START:
+        chrome_data_folder = build_profile(user_chrome_folder, FAST_START_PROFILE)
+    
+    # Each profile has its own port (saved in the profile), if it's not set
+    # The user's profile can be open in the user's chrome: kill all chrome
+    dedicated_profile = bool(INSTANCE_NAME or FAST_START)
+    debugger_address = ""
+    if dedicated_profile:
+        debugger_address = CHROME_DEBUG_ADDRESS or \
+            f"127.0.0.1:{get_debug_port(chrome_data_folder)}"
     
     # Initialize chrome
-    scraper = WebScraping(
-        headless=HEADLESS,
-        chrome_folder=chrome_data_folder,
-        start_killing=True,
-    )
+    browser_pool = None
+    if BROWSER_POOL:
+        
+        # Active and standby browsers, each one with its own profile
+        standby_chrome_folder = STANDBY_CHROME_FOLDER
+        if not standby_chrome_folder and INSTANCE_NAME:
+            standby_chrome_folder = build_profile(
+                user_chrome_folder, os.path.join(PROFILES_FOLDER, f"{INSTANCE_NAME}-standby")
+            )
+        
+        # Standby without profile would not be logged in
+        if not standby_chrome_folder:
+            print("BROWSER_POOL needs STANDBY_CHROME_FOLDER (or INSTANCE_NAME).")
+            quit()
+        chrome_folders = [chrome_data_folder, standby_chrome_folder]
+        
+        def create_scraper(slot: int) -> WebScraping:
+            return WebScraping(
+                headless=HEADLESS,
+                chrome_folder=chrome_folders[slot],
+                start_killing=bool(chrome_folders[slot]),
+                
+                # Only in the first start: later ones would kill the other browser
+                kill_all_chrome=not dedicated_profile and slot == 0 and not browser_pool,
+                performance_log=DISCORD_MESSAGE_SOURCE == "gateway",
+                fast_start=FAST_START,
+                driver_path=CHROMEDRIVER_PATH,
+                debugger_address=debugger_address if slot == 0 else "",
+                block_rules=BLOCK_RULES,
+                cdp_scripts=CDP_SCRIPTS,
+            )
+        
+        # Login errors of the standby are raised (and logged by the pool)
+        def warm_up(scraper: WebScraping):
+            FactoryScraper(scraper=scraper).validate_login(quit_on_error=False)
+            DiscordChatReader(
+                scraper=scraper,
+                server_link=DISCORD_SERVER_LINK,
+                channels_names=DISCORD_CHANNELS_NAMES,
+                keywords=KEYWORDS,
+            ).validate_login(quit_on_error=False)
+        
+        browser_pool = BrowserPool(create_scraper=create_scraper, warm_up=warm_up)
+        scraper = browser_pool.active
+    else:
+        scraper = WebScraping(
+            headless=HEADLESS,
+            chrome_folder=chrome_data_folder,
+            start_killing=True,
+            kill_all_chrome=not dedicated_profile,
+            performance_log=DISCORD_MESSAGE_SOURCE == "gateway",
+            fast_start=FAST_START,
+            driver_path=CHROMEDRIVER_PATH,
+            debugger_address=debugger_address,
+            block_rules=BLOCK_RULES,
+            cdp_scripts=CDP_SCRIPTS,
+        )
     
-    # Initialize scrapers
+    # Initialize scrapers (sharing orders states)
+    order_ledger = OrderLedger()
+    factory_api_client = None
+    if FACTORY_API_ORDERS_URL and FACTORY_API_ACCEPT_URL:
+        factory_api_client = FactoryApiClient(
+            scraper=scraper,
+            orders_url=FACTORY_API_ORDERS_URL,
+            accept_url=FACTORY_API_ACCEPT_URL,
+        )
+    debug_capture = DebugCapture(
+        scraper=scraper,
+        mode=DEBUG_CAPTURE_MODE,
+    )
     factory_scraper = FactoryScraper(
         scraper=scraper,
+        accept_mode=FACTORY_ACCEPT_MODE,
+        api_client=factory_api_client,
+        ledger=order_ledger,
+        debug_capture=debug_capture,
     )
+    message_source = None
+    if DISCORD_MESSAGE_SOURCE == "gateway":
+        message_source = GatewayMessageSource(
+            scraper=scraper,
+            server_link=DISCORD_SERVER_LINK,
+            channels_names=DISCORD_CHANNELS_NAMES,
+        )
+    memory_governor = None
+    if DISCORD_MAX_HEAP_MB:
+        memory_governor = MemoryGovernor(
+            scraper=scraper,
+            list_selector='[data-list-id="chat-messages"]',
+            max_heap_mb=DISCORD_MAX_HEAP_MB,
+            max_nodes=DISCORD_MAX_DOM_NODES,
+            keep_items=DISCORD_KEEP_MESSAGES,
+        )
     discord_chat_reader = DiscordChatReader(
         scraper=scraper,
         server_link=DISCORD_SERVER_LINK,
         channels_names=DISCORD_CHANNELS_NAMES,
         keywords=KEYWORDS,
+        push_mode=DISCORD_PUSH_MODE,
+        push_wait=DISCORD_PUSH_WAIT,
+        parallel_mode=DISCORD_PARALLEL_MODE,
+        keep_tab_open=DISCORD_KEEP_TAB_OPEN,
+        message_source=message_source,
+        ledger=order_ledger,
+        memory_governor=memory_governor,
+        poll_wait=DISCORD_POLL_WAIT,
     )
+    
+    # Update scrapers in browser failovers
+    if browser_pool:
+        # (api client before factory scraper, who reloads its session)
+        clients = [factory_api_client, factory_scraper, discord_chat_reader,
+                   debug_capture, message_source, memory_governor]
+        for client in clients:
+            if client:
+                browser_pool.attach(client)
+      
+    # Multi instance mode: detector or worker sharing a claim store
+    if BOT_ROLE in ("detector", "worker"):
+        order_coordinator = OrderCoordinator(
+            claim_store=get_claim_store(CLAIM_STORE_URL),
+            worker_id=WORKER_ID,
+            shard_index=SHARD_INDEX,
+            shards_count=SHARDS_COUNT,
+        )
+        if BOT_ROLE == "detector":
+            discord_chat_reader.validate_login()
+            order_coordinator.run_detector(discord_chat_reader)
+        else:
+            factory_scraper.validate_login()
+            order_coordinator.run_worker(factory_scraper)
       
     # Validate login in factory
     factory_scraper.validate_login()
@@ -59,10 +255,34 @@ if __name__ == "__main__":
     # Validate login in discord
     discord_chat_reader.validate_login()
     
+    # Detect and accept orders at the same time
+    if PIPELINE_MODE:
+        while True:
+            try:
+                order_pipeline = OrderPipeline(
+                    discord_chat_reader=discord_chat_reader,
+                    factory_scraper=factory_scraper,
+                )
+                order_pipeline.run()
+                quit()
+            except WebDriverException as error:
+                
+                # Replace the browser only if its session is dead
+                if not browser_pool or not browser_pool.is_dead(error):
+                    raise
+                browser_pool.failover()
+    
     # Main loop
     while True:
-        # Wait for messages
-        discord_chat_reader.wait_for_messages()
-        
-        # Accept orders
-        factory_scraper.loop_orders(discord_chat_reader.order_ids)
+        try:
+            # Wait for messages
+            discord_chat_reader.wait_for_messages()
+            
+            # Accept orders
+            factory_scraper.loop_orders(discord_chat_reader.order_ids)
+        except WebDriverException as error:
+            
+            # Replace the browser only if its session is dead
+            if not browser_pool or not browser_pool.is_dead(error):
+                raise
+            browser_pool.failover()
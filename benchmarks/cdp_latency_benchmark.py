@@ -0,0 +1,70 @@
+""" Compare the round trip latency of the scripts sent with selenium
+(python -> chromedriver -> chrome) and with the devtools websocket of the
+tab (python -> chrome), in a local page with headless chrome.
+
+Usage:
+    python benchmarks/cdp_latency_benchmark.py [--calls 500]
+"""
+
+import os
+import sys
+import argparse
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import start_server  # noqa: E402
+from pages_benchmark import get_percentiles  # noqa: E402
+from libs.web_scraping import WebScraping  # noqa: E402
+
+# Hot path script, like reading the last messages of a channel
+SCRIPT = """
+    const messages = document.querySelectorAll(arguments[0]);
+    return Array.from(messages).map(message => message.textContent);
+"""
+SELECTOR = '[data-list-id="chat-messages"] > li:nth-last-child(-n+8) h3 + div'
+
+
+def time_calls(run_script, calls: int) -> list:
+    """ Run the script many times
+
+    Args:
+        run_script (function): function who runs the script
+        calls (int): number of calls
+
+    Returns:
+        list: round trip times in ms
+    """
+
+    times = []
+    for _ in range(calls):
+        start = perf_counter()
+        run_script(SCRIPT, SELECTOR)
+        times.append((perf_counter() - start) * 1000)
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Selenium vs devtools websocket latency")
+    parser.add_argument("--pages", default=os.path.join(os.path.dirname(__file__), "pages"))
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_server(folder=args.pages)
+
+    scraper = WebScraping(headless=True, cdp_scripts=True)
+    scraper.set_page(f"http://127.0.0.1:{server.server_port}/discord.html")
+
+    # Warm up both paths (first websocket connection included)
+    time_calls(scraper.driver.execute_script, 10)
+    time_calls(scraper.run_script, 10)
+
+    selenium_times = time_calls(scraper.driver.execute_script, args.calls)
+    cdp_times = time_calls(scraper.run_script, args.calls)
+
+    scraper.end_browser()
+    server.shutdown()
+
+    print("\nResults")
+    print(f"Selenium execute_script: {get_percentiles(selenium_times)}")
+    print(f"Devtools websocket: {get_percentiles(cdp_times)}")
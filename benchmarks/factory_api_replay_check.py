@@ -0,0 +1,52 @@
+""" Replay recorded Boostingfactory api responses (stub server) through
+FactoryApiClient, offline, and check the orders read and accepted.
+
+The default recording has one available order, one accepted order and
+one order already taken (409 response).
+
+Usage:
+    python benchmarks/factory_api_replay_check.py [--recordings path] [--expected 123456]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import start_server  # noqa: E402
+from libs.factory_api_client import FactoryApiClient  # noqa: E402
+
+ORDER_IDS = ["123456", "654321"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Factory api replay check")
+    parser.add_argument("--recordings", default=os.path.join(
+        os.path.dirname(__file__), "recordings", "factory_api_example.json"))
+    parser.add_argument("--expected", default="123456")
+    args = parser.parse_args()
+
+    server = start_server(args.recordings)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    # No browser: the recorded responses don't need a session
+    api_client = FactoryApiClient(
+        scraper=None,
+        orders_url=f"{base_url}/api/orders/available",
+        accept_url=f"{base_url}/api/orders/{{order_id}}/accept",
+    )
+
+    orders = api_client.get_orders()
+    accepted = api_client.accept_orders(ORDER_IDS)
+    server.shutdown()
+
+    order_ids = [order["id"] for order in orders]
+    expected = args.expected.split(",")
+
+    print(f"\nAvailable orders: {order_ids}")
+    print(f"Accepted orders: {accepted}")
+    if order_ids != expected or accepted != expected:
+        print(f"Replay check failed: expected {expected}")
+        sys.exit(1)
+    print("Replay check passed.")
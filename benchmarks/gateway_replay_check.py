@@ -0,0 +1,54 @@
+""" Replay recorded Discord gateway frames (performance log entries, like
+the ones saved with GatewayMessageSource record_path) through
+DiscordChatReader, offline, and check the order ids found.
+
+The default recording has plain and zlib-stream sockets, messages with
+upper case text and markdown, a message without @everyone, and messages
+of other channels and servers.
+
+Usage:
+    python benchmarks/gateway_replay_check.py [--frames path] [--expected 777,555]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.discord_chat_reader import DiscordChatReader  # noqa: E402
+from libs.message_sources import GatewayMessageSource, load_frame_log  # noqa: E402
+
+SERVER_LINK = "https://discord.com/channels/512561256127612"
+CHANNELS_NAMES = ["warzone"]
+KEYWORDS = ["camo warzone"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway frames replay check")
+    parser.add_argument("--frames", default=os.path.join(
+        os.path.dirname(__file__), "recordings", "gateway_frames.jsonl"))
+    parser.add_argument("--expected", default="777,555")
+    args = parser.parse_args()
+
+    message_source = GatewayMessageSource(
+        server_link=SERVER_LINK,
+        channels_names=CHANNELS_NAMES,
+        log_reader=load_frame_log(args.frames),
+    )
+    reader = DiscordChatReader(
+        scraper=None,
+        server_link=SERVER_LINK,
+        channels_names=CHANNELS_NAMES,
+        keywords=KEYWORDS,
+        message_source=message_source,
+    )
+
+    order_ids = reader.collect_order_ids()
+    expected = args.expected.split(",")
+
+    print(f"\nOrder ids found: {order_ids}")
+    if order_ids != expected:
+        print(f"Replay check failed: expected {expected}")
+        sys.exit(1)
+    print("Replay check passed.")
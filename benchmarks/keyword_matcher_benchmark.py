@@ -0,0 +1,96 @@
+""" Compare the compiled KeywordMatcher against the original keywords loop
+
+Usage:
+    python benchmarks/keyword_matcher_benchmark.py [messages_num]
+"""
+
+import os
+import sys
+import csv
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.keyword_matcher import KeywordMatcher  # noqa: E402
+
+
+def legacy_match(message: str, keywords: list) -> str:
+    """ Original loop of DiscordChatReader.__save_new_order_ids__ """
+
+    for keyword in keywords:
+        words_num = len(keyword.split(" "))
+        words_found = 0
+        for word in keyword.split(" "):
+            if word in message:
+                words_found += 1
+
+        if words_found == words_num:
+            return keyword
+
+    return None
+
+
+def load_keywords() -> list:
+    """ Read keywords.csv, or generate random keywords if it doesn't exist """
+
+    csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "keywords.csv")
+    if os.path.isfile(csv_path):
+        with open(csv_path, "r") as file:
+            return [line[0].lower() for line in csv.reader(file) if line]
+
+    games = ["warzone", "call of duty", "valorant", "apex", "destiny 2",
+             "overwatch", "fortnite", "league of legends", "diablo 4", "wow"]
+    services = ["boost", "camo", "rank", "raid", "unlock", "leveling",
+                "coaching", "badges", "carry", "nightfall"]
+    extras = ["", " pc", " ps5", " xbox", " fast", " duo", " solo"]
+    keywords = set()
+    while len(keywords) < 300:
+        keyword = f"{random.choice(services)} {random.choice(games)}"
+        keywords.add(keyword + random.choice(extras))
+    return sorted(keywords)
+
+
+def random_messages(keywords: list, messages_num: int) -> list:
+    """ Build @everyone messages, some of them with keywords """
+
+    noise = ["new", "order", "available", "price", "$25", "eu", "na",
+             "payment", "today", "asap", "customer", "notes", "region"]
+    messages = []
+    for _ in range(messages_num):
+        words = random.choices(noise, k=20)
+        if random.random() < 0.3:
+            words += random.choice(keywords).split(" ")
+        random.shuffle(words)
+        order_id = random.randint(100000, 999999)
+        messages.append(f"@everyone {' '.join(words)} order id: {order_id}")
+    return messages
+
+
+if __name__ == "__main__":
+    messages_num = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    random.seed(0)
+
+    keywords = load_keywords()
+    messages = random_messages(keywords, messages_num)
+    matcher = KeywordMatcher(keywords)
+
+    # Same results than the original loop
+    for message in messages:
+        assert matcher.match(message) == legacy_match(message, keywords), message
+
+    legacy_time = timeit.timeit(
+        lambda: [legacy_match(message, keywords) for message in messages],
+        number=3,
+    ) / 3
+    compiled_time = timeit.timeit(
+        lambda: [matcher.match(message) for message in messages],
+        number=3,
+    ) / 3
+    build_time = timeit.timeit(lambda: KeywordMatcher(keywords), number=3) / 3
+
+    print(f"Keywords: {len(keywords)}, messages: {len(messages)}")
+    print(f"Build matcher: {build_time * 1000:.2f} ms")
+    print(f"Original loop: {legacy_time * 1000:.2f} ms")
+    print(f"Compiled matcher: {compiled_time * 1000:.2f} ms")
+    print(f"Speedup: x{legacy_time / compiled_time:.1f}")
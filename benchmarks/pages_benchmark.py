@@ -0,0 +1,256 @@
+""" Measure detection latency, accept latency and throughput of the bot
+against local pages, with headless chrome and simulated message bursts.
+
+The pages are served from benchmarks/pages (or --pages folder, with
+captured "discord.html" and "factory.html" files): the benchmark helpers
+(messages posting, orders and accept dialog) are injected in the pages, so
+captured html with the same selectors works too.
+
+Usage:
+    python benchmarks/pages_benchmark.py [--rounds 20] [--burst 20] [--interval 20]
+"""
+
+import os
+import sys
+import argparse
+import statistics
+from time import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import start_server  # noqa: E402
+from libs.web_scraping import WebScraping  # noqa: E402
+from libs.factory_scraper import FactoryScraper  # noqa: E402
+from libs.discord_chat_reader import DiscordChatReader  # noqa: E402
+from libs.latency_tracker import latency  # noqa: E402
+
+CHANNEL = "bench-orders"
+KEYWORD = "camo warzone"
+MESSAGE = "@everyone new order game: warzone service: camo price: $20 order id: {order_id}"
+
+DISCORD_HELPERS = """
+    if (window.benchReady) {
+        return;
+    }
+    window.benchReady = true;
+    window.benchPosted = {};
+    let counter = 0;
+
+    const addMessage = (text) => {
+        const chat = document.querySelector('[data-list-id="chat-messages"]');
+        const li = document.createElement('li');
+        li.id = `chat-messages-${chat.dataset.channel}-${counter++}`;
+        li.innerHTML = '<h3>bench</h3><div></div>';
+        li.querySelector('div').textContent = text;
+        chat.appendChild(li);
+    };
+
+    // Channels links render their chat instead of navigating
+    document.addEventListener('click', event => {
+        const link = event.target.closest('[data-dnd-name] a');
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        const chat = document.querySelector('[data-list-id="chat-messages"]');
+        if (chat.dataset.channel !== link.href.split('/').pop() || !chat.children.length) {
+            chat.dataset.channel = link.href.split('/').pop();
+            chat.innerHTML = '';
+            addMessage('welcome');
+        }
+    }, true);
+
+    // Post one message by order id, every interval ms, after delay ms
+    window.benchPost = (orderIds, template, interval, delay) => {
+        orderIds.forEach((orderId, index) => setTimeout(() => {
+            addMessage(template.replace('{order_id}', orderId));
+            window.benchPosted[orderId] = Date.now();
+        }, delay + index * interval));
+    };
+"""
+
+FACTORY_HELPERS = """
+    if (window.benchReady) {
+        return;
+    }
+    window.benchReady = true;
+    let accepting = null;
+
+    window.benchAddOrders = (orderIds) => {
+        const list = document.querySelector('#availableOrders');
+        for (const orderId of orderIds) {
+            const preloader = document.createElement('div');
+            preloader.className = 'orders-preloader';
+            const order = document.createElement('div');
+            order.className = 'single-order';
+            order.innerHTML = `
+                <h3>Warzone camo ${orderId}</h3><span>01/01/2025 - #${orderId}</span>
+                <button class="btn order-accept-btn btn-for-bright">Accept</button>
+            `;
+            list.append(preloader, order);
+        }
+    };
+
+    // Orders tab reloads the orders list
+    document.addEventListener('click', event => {
+        if (!event.target.closest('.nav-tabs a')) {
+            return;
+        }
+        event.preventDefault();
+        const list = document.querySelector('#availableOrders');
+        const orders = Array.from(list.children);
+        list.innerHTML = '';
+        setTimeout(() => list.append(...orders), 20);
+    });
+
+    // Accept button opens a confirmation dialog, ok button removes the order
+    document.addEventListener('click', event => {
+        const accept = event.target.closest('.order-accept-btn');
+        if (accept) {
+            accepting = accept.closest('.single-order');
+            setTimeout(() => {
+                const dialog = document.createElement('div');
+                dialog.id = 'bench-dialog';
+                dialog.innerHTML = '<button class="answer-btn">OK</button>';
+                document.body.appendChild(dialog);
+            }, 30);
+        }
+        if (event.target.closest('.answer-btn')) {
+            document.querySelector('#bench-dialog').remove();
+            if (accepting) {
+                accepting.previousElementSibling.remove();
+                accepting.remove();
+                accepting = null;
+            }
+        }
+    });
+"""
+
+
+def get_percentiles(values: list) -> str:
+    """ Format p50, p95 and max of values in ms
+
+    Args:
+        values (list): values in ms
+
+    Returns:
+        str: formatted percentiles
+    """
+
+    if not values:
+        return "no data"
+    values = sorted(values)
+    p95 = values[min(int(0.95 * len(values)), len(values) - 1)]
+    return f"p50 {statistics.median(values):.1f} ms, p95 {p95:.1f} ms, " \
+           f"max {values[-1]:.1f} ms ({len(values)} samples)"
+
+
+def post_messages(scraper: WebScraping, reader: DiscordChatReader, order_ids: list,
+                  interval: int = 0, delay: int = 200):
+    """ Post messages in the discord page, and return to its tab """
+
+    scraper.switch_to_handle(reader.tab_handle)
+    scraper.driver.execute_script(
+        "window.benchPost(arguments[0], arguments[1], arguments[2], arguments[3])",
+        order_ids, MESSAGE, interval, delay
+    )
+
+
+def get_posted_times(scraper: WebScraping, reader: DiscordChatReader) -> dict:
+    """ Return when each order id was posted (ms timestamps) """
+
+    scraper.switch_to_handle(reader.tab_handle)
+    return scraper.driver.execute_script("return window.benchPosted")
+
+
+def accept_orders(scraper: WebScraping, factory: FactoryScraper, order_ids: list) -> float:
+    """ List the orders in the factory page and accept them
+
+    Returns:
+        float: accept time in ms
+    """
+
+    scraper.switch_to_handle(factory.tab_handle)
+    scraper.driver.execute_script("window.benchAddOrders(arguments[0])", order_ids)
+    start = time()
+    factory.loop_orders(order_ids)
+    return (time() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline bot benchmark")
+    parser.add_argument("--pages", default=os.path.join(os.path.dirname(__file__), "pages"))
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--interval", type=int, default=20)
+    parser.add_argument("--accept-mode", default="selenium")
+    parser.add_argument("--show-browser", action="store_true")
+    args = parser.parse_args()
+
+    server = start_server(folder=args.pages)
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    scraper = WebScraping(headless=not args.show_browser)
+    factory = FactoryScraper(scraper=scraper, accept_mode=args.accept_mode)
+    factory.home_page = f"{url}/factory.html"
+    reader = DiscordChatReader(
+        scraper=scraper,
+        server_link=f"{url}/discord.html",
+        channels_names=[CHANNEL],
+        keywords=[KEYWORD],
+        push_mode=True,
+        push_wait=1,
+        keep_tab_open=True,
+    )
+
+    factory.validate_login()
+    reader.validate_login()
+    scraper.switch_to_handle(factory.tab_handle)
+    scraper.driver.execute_script(FACTORY_HELPERS)
+    scraper.switch_to_handle(reader.tab_handle)
+    scraper.driver.execute_script(DISCORD_HELPERS)
+
+    detection_times = []
+    accept_times = []
+    next_id = 100000
+
+    # Single messages: detection and accept latency
+    for _ in range(args.rounds):
+        order_id = str(next_id)
+        next_id += 1
+
+        post_messages(scraper, reader, [order_id])
+        reader.wait_for_messages()
+        detected = time() * 1000
+
+        posted = get_posted_times(scraper, reader)[order_id]
+        detection_times.append(detected - posted)
+        accept_times.append(accept_orders(scraper, factory, reader.order_ids))
+
+    # Message burst: throughput
+    burst_ids = [str(next_id + index) for index in range(args.burst)]
+    post_messages(scraper, reader, burst_ids, interval=args.interval)
+    burst_detected = {}
+    while len(burst_detected) < len(burst_ids):
+        reader.wait_for_messages()
+        for order_id in reader.order_ids:
+            burst_detected[order_id] = time() * 1000
+    posted = get_posted_times(scraper, reader)
+    burst_latencies = [burst_detected[order_id] - posted[order_id] for order_id in burst_ids]
+    burst_time = max(burst_detected.values()) - min(posted[order_id] for order_id in burst_ids)
+    accept_burst_time = accept_orders(scraper, factory, burst_ids)
+
+    scraper.end_browser()
+    server.shutdown()
+
+    print("\nResults")
+    print(f"Detection latency: {get_percentiles(detection_times)}")
+    print(f"Accept latency: {get_percentiles(accept_times)}")
+    print(f"Burst detection latency: {get_percentiles(burst_latencies)}")
+    print(f"Burst detection throughput: {len(burst_ids) / (burst_time / 1000):.1f} messages/s")
+    print(f"Burst accept throughput: {len(burst_ids) / (accept_burst_time / 1000):.1f} orders/s")
+
+    print("\nStages")
+    for stage, stats in sorted(latency.get_stats().items()):
+        print(f"{stage}: p50 {stats['p50'] * 1000:.1f} ms, p95 {stats['p95'] * 1000:.1f} ms, "
+              f"count {stats['count']}")
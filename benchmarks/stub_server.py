@@ -0,0 +1,124 @@
+""" Local http server who replays recorded responses
+
+Recordings file format (json):
+    {
+        "GET /api/orders": {"status": 200, "body": {...}},
+        "POST /api/orders/123/accept": {"status": 200, "body_file": "accept.json"}
+    }
+Paths are matched without query string. Files in the recordings folder
+are served as static files when there is no recorded response.
+
+Usage:
+    python benchmarks/stub_server.py benchmarks/recordings/factory_api_example.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+def get_handler(recordings: dict, folder: str):
+    """ Create request handler class for the recordings
+
+    Args:
+        recordings (dict): recorded responses by "METHOD /path"
+        folder (str): folder of the static files and body files
+    """
+
+    class StubHandler (SimpleHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=folder, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+        def __replay__(self) -> bool:
+            path = urlparse(self.path).path
+            recording = recordings.get(f"{self.command} {path}")
+            if recording is None:
+                return False
+
+            # Discard request body
+            length = int(self.headers.get("Content-Length", 0))
+            if length:
+                self.rfile.read(length)
+
+            if "body_file" in recording:
+                with open(os.path.join(folder, recording["body_file"]), "rb") as file:
+                    body = file.read()
+            else:
+                body = recording.get("body", "")
+                if not isinstance(body, str):
+                    body = json.dumps(body)
+                body = body.encode("utf-8")
+
+            self.send_response(recording.get("status", 200))
+            headers = {"Content-Type": "application/json"}
+            headers.update(recording.get("headers", {}))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return True
+
+        def do_GET(self):
+            if not self.__replay__():
+                super().do_GET()
+
+        def do_POST(self):
+            if not self.__replay__():
+                self.send_error(404)
+
+    return StubHandler
+
+
+def start_server(recordings_path: str = "", folder: str = "",
+                 port: int = 0) -> ThreadingHTTPServer:
+    """ Start stub server in a background thread
+
+    Args:
+        recordings_path (str, optional): recordings json file. Defaults to "".
+        folder (str, optional): static files folder. Defaults to the
+            recordings file folder.
+        port (int, optional): port (0 for a free one). Defaults to 0.
+
+    Returns:
+        ThreadingHTTPServer: running server (url port in server.server_port)
+    """
+
+    recordings = {}
+    if recordings_path:
+        with open(recordings_path, "r", encoding="utf-8") as file:
+            recordings = json.load(file)
+        if not folder:
+            folder = os.path.dirname(os.path.abspath(recordings_path))
+
+    handler = get_handler(recordings, folder or os.getcwd())
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded responses")
+    parser.add_argument("recordings", nargs="?", default="")
+    parser.add_argument("--folder", default="")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = start_server(args.recordings, args.folder, args.port)
+    print(f"Stub server running in http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
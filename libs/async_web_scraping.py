@@ -0,0 +1,289 @@
+import asyncio
+
+import aiohttp
+from selenium.common.exceptions import WebDriverException
+
+from libs.web_scraping import WebScraping
+
+
+class AsyncWebScraping ():
+    """
+    Asyncio facade of a running WebScraping browser: the webdriver commands
+    are sent to chromedriver with a pooled aiohttp session, so many tabs
+    and browsers can be driven from one event loop.
+    Chromedriver runs the commands of each session one by one, in its
+    current tab: the commands with a tab handle switch to it first, and
+    hold the session lock until they end.
+    The session is shared with the sync WebScraping: tab switches update
+    its current handle (used by run_script), and the script timeout is
+    restored after each async script, but sync and async commands must
+    not run at the same time (they share the current tab).
+    """
+
+    ELEMENT_KEY = "element-6066-11e4-a6e6-4a4e9f7ea7a2"
+
+    def __init__(self, scraper: WebScraping, time_out: float = 30,
+                 max_connections: int = 8) -> None:
+        """ Read session of the scraper (the http session is created in start)
+
+        Args:
+            scraper (WebScraping): scraper instance, with the browser already open
+            time_out (float, optional): seconds to wait each command. Defaults to 30.
+            max_connections (int, optional): connections to chromedriver. Defaults to 8.
+        """
+
+        self.scraper = scraper
+        self.time_out = time_out
+        self.max_connections = max_connections
+
+        executor = scraper.driver.command_executor
+        self.executor_url = getattr(executor, "_url", "").rstrip("/")
+        self.session_id = scraper.driver.session_id
+
+        self.session = None
+        self.lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def start(self):
+        """ Create http session with keep alive connections """
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=self.time_out),
+        )
+
+    async def close(self):
+        """ Close http session (the browser keeps open) """
+
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def __command__(self, method: str, path: str, payload: dict = None):
+        """ Send a W3C webdriver command of the session
+
+        Args:
+            method (str): http method
+            path (str): command path, after the session url
+            payload (dict, optional): command data. Defaults to None.
+
+        Returns:
+            any: command value
+        """
+
+        url = f"{self.executor_url}/session/{self.session_id}{path}"
+        async with self.session.request(method, url, json=payload) as response:
+            data = await response.json(content_type=None)
+
+        value = data.get("value") if data else None
+        if response.status != 200:
+            error = value.get("error", "") if isinstance(value, dict) else ""
+            message = value.get("message", "") if isinstance(value, dict) else ""
+            raise WebDriverException(f"{error}: {message}")
+
+        return value
+
+    async def __switch__(self, handle: str):
+        """ Switch to a tab (session lock must be acquired)
+
+        Args:
+            handle (str): tab handle, or None to keep the current tab
+        """
+
+        if handle:
+            await self.__command__("POST", "/window", {"handle": handle})
+            self.scraper.current_handle = handle
+
+    async def switch_to_handle(self, handle: str):
+        """ Switch to a tab
+
+        Args:
+            handle (str): tab handle
+        """
+
+        async with self.lock:
+            await self.__switch__(handle)
+
+    async def set_page(self, web_page: str, handle: str = None):
+        """ Load a page
+
+        Args:
+            web_page (str): page url
+            handle (str, optional): tab handle. Defaults to None (current tab).
+        """
+
+        async with self.lock:
+            await self.__switch__(handle)
+            await self.__command__("POST", "/url", {"url": web_page})
+
+    async def execute_script(self, script: str, *args, handle: str = None):
+        """ Run js code in the page
+
+        Args:
+            script (str): js code (with "return" to get values)
+            args: script arguments (available in js "arguments")
+            handle (str, optional): tab handle. Defaults to None (current tab).
+
+        Returns:
+            any: script value
+        """
+
+        async with self.lock:
+            await self.__switch__(handle)
+            return await self.__command__("POST", "/execute/sync", {
+                "script": script,
+                "args": list(args),
+            })
+
+    async def execute_async_script(self, script: str, *args, handle: str = None,
+                                   time_out: float = 10):
+        """ Run async js code in the page (ended by calling the last argument)
+
+        Args:
+            script (str): js code
+            args: script arguments
+            handle (str, optional): tab handle. Defaults to None (current tab).
+            time_out (float, optional): seconds to wait the script. Defaults to 10.
+
+        Returns:
+            any: value sent to the callback
+        """
+
+        async with self.lock:
+            await self.__switch__(handle)
+            # Restore the script timeout of the sync side after the script
+            timeouts = await self.__command__("GET", "/timeouts")
+            await self.__command__("POST", "/timeouts", {"script": int(time_out * 1000)})
+            try:
+                return await self.__command__("POST", "/execute/async", {
+                    "script": script,
+                    "args": list(args),
+                })
+            finally:
+                await self.__command__("POST", "/timeouts", {"script": timeouts["script"]})
+
+    async def get_elems(self, selector: str, handle: str = None) -> list:
+        """ Get elements references
+
+        Args:
+            selector (str): css selector
+            handle (str, optional): tab handle. Defaults to None (current tab).
+
+        Returns:
+            list: elements references (usable as scripts arguments)
+        """
+
+        async with self.lock:
+            await self.__switch__(handle)
+            return await self.__command__("POST", "/elements", {
+                "using": "css selector",
+                "value": selector,
+            })
+
+    async def get_texts(self, selector: str, handle: str = None) -> list:
+        """ Get the text of the elements
+
+        Args:
+            selector (str): css selector
+            handle (str, optional): tab handle. Defaults to None (current tab).
+
+        Returns:
+            list: elements texts
+        """
+
+        script = """
+            return Array.from(document.querySelectorAll(arguments[0]), elem => elem.innerText)
+        """
+        return await self.execute_script(script, selector, handle=handle)
+
+    async def click_js(self, selector: str, handle: str = None) -> bool:
+        """ Click the first element with js
+
+        Args:
+            selector (str): css selector
+            handle (str, optional): tab handle. Defaults to None (current tab).
+
+        Returns:
+            bool: True if the element was found
+        """
+
+        script = """
+            const elem = document.querySelector(arguments[0]);
+            if (elem) {
+                elem.click();
+            }
+            return Boolean(elem);
+        """
+        return await self.execute_script(script, selector, handle=handle)
+
+    async def wait_for_selector(self, selector: str, time_out: float = 10,
+                                poll_time: float = 0.01, handle: str = None) -> bool:
+        """ Wait for an element to be in the page (other commands can run
+        between checks)
+
+        Args:
+            selector (str): css selector
+            time_out (float, optional): max seconds to wait. Defaults to 10.
+            poll_time (float, optional): seconds between checks. Defaults to 0.01.
+            handle (str, optional): tab handle. Defaults to None (current tab).
+
+        Returns:
+            bool: True if the element was found, False if timed out
+        """
+
+        script = "return Boolean(document.querySelector(arguments[0]))"
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + time_out
+        while loop.time() < end_time:
+            if await self.execute_script(script, selector, handle=handle):
+                return True
+            await asyncio.sleep(poll_time)
+
+        self.scraper.logger.error(f"Timed out: Element '{selector}' not found on the page.")
+        return False
+
+    async def wait_for_dom_change(self, selector: str = "body", time_out: float = 10,
+                                  handle: str = None) -> bool:
+        """ Wait for the first change inside an element, with a
+        MutationObserver in the page
+
+        Args:
+            selector (str, optional): css selector. Defaults to "body".
+            time_out (float, optional): max seconds to wait. Defaults to 10.
+            handle (str, optional): tab handle. Defaults to None (current tab).
+
+        Returns:
+            bool: True if the element changed, False if timed out or not found
+        """
+
+        script = """
+            const done = arguments[arguments.length - 1];
+            const elem = document.querySelector(arguments[0]);
+            if (!elem) {
+                done(false);
+                return;
+            }
+            const observer = new MutationObserver(() => {
+                observer.disconnect();
+                done(true);
+            });
+            observer.observe(elem, {
+                childList: true, subtree: true, attributes: true, characterData: true
+            });
+            setTimeout(() => {
+                observer.disconnect();
+                done(false);
+            }, arguments[1]);
+        """
+        changed = await self.execute_async_script(
+            script, selector, int(time_out * 1000), handle=handle, time_out=time_out + 1)
+
+        if not changed:
+            self.scraper.logger.error(f"Timed out: Element '{selector}' didn't change.")
+        return changed
@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from selenium import webdriver
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 " \
+             "(KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"
+
+
+@dataclass(frozen=True)
+class BrowserLaunchConfig ():
+    """
+    Immutable chrome launch settings: each launch builds new options from
+    them (with the arguments cached by config), so relaunches never repeat
+    flags, and browsers with different configs can run at the same time.
+    """
+
+    headless: bool = False
+    chrome_folder: str = ""
+    user_agent: bool = False
+    download_folder: str = ""
+    extensions: tuple = ()
+    incognito: bool = False
+    experimentals: bool = True
+    width: int = 1280
+    height: int = 720
+    mute: bool = True
+    performance_log: bool = False
+    proxy_server: str = ""
+    proxy_port: str = ""
+    proxy_extension: str = ""
+    debugger_address: str = ""
+
+    def build_options(self, reattach: bool = False) -> webdriver.ChromeOptions:
+        """ Create new chrome options of the config
+
+        Args:
+            reattach (bool, optional): options to attach to the chrome running
+                in the debugger address (only the chromedriver capabilities, like
+                the performance log, can change). Defaults to False.
+
+        Returns:
+            webdriver.ChromeOptions: chrome options
+        """
+
+        options = webdriver.ChromeOptions()
+
+        # Network events (read with driver.get_log("performance")), also
+        # in reattached chrome (logs are read by chromedriver)
+        if self.performance_log:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+        if reattach:
+            options.debugger_address = self.debugger_address
+            return options
+
+        for argument in get_arguments(self):
+            options.add_argument(argument)
+
+        # Hardcoded for testing purposes
+        options.add_experimental_option("detach", True)
+
+        if self.experimentals:
+            options.add_experimental_option(
+                'excludeSwitches', ['enable-logging', "enable-automation"])
+            options.add_experimental_option('useAutomationExtension', False)
+
+        if self.download_folder:
+            prefs = {"download.default_directory": f"{self.download_folder}",
+                     "download.prompt_for_download": "false",
+                     'profile.default_content_setting_values.automatic_downloads': 1,
+                     'profile.default_content_settings.popups': 0,
+                     "download.directory_upgrade": True,
+                     "plugins.always_open_pdf_externally": True,
+                     "plugins.plugins_list": [{"enabled": False, "name": "Chrome PDF Viewer"}],
+                     'download.extensions_to_open': 'xml',
+                     'safebrowsing.enabled': True
+                     }
+            options.add_experimental_option("prefs", prefs)
+
+        for extension in self.extensions:
+            options.add_extension(extension)
+
+        # Proxy with autentication
+        if self.proxy_extension:
+            options.add_extension(self.proxy_extension)
+
+        return options
+
+
+@lru_cache(maxsize=32)
+def get_arguments(config: BrowserLaunchConfig) -> tuple:
+    """ Return the chrome arguments of a launch config
+
+    Args:
+        config (BrowserLaunchConfig): launch config
+
+    Returns:
+        tuple: chrome arguments
+    """
+
+    arguments = [
+        '--no-sandbox',
+        '--start-maximized',
+        '--output=/dev/null',
+        '--log-level=3',
+        "--disable-notifications",
+        "--disable-infobars",
+        "--safebrowsing-disable-download-protection",
+        "--disable-dev-shm-usage",
+        "--disable-renderer-backgrounding",
+        "--disable-background-timer-throttling",
+        "--disable-backgrounding-occluded-windows",
+        "--disable-client-side-phishing-detection",
+        "--disable-crash-reporter",
+        "--disable-oopr-debug-crash-dump",
+        "--no-crash-upload",
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-low-res-tiling",
+        "--silent",
+        f"--window-size={config.width},{config.height}",
+    ]
+
+    if config.headless:
+        arguments.append("--headless=new")
+
+    if config.mute:
+        arguments.append("--mute-audio")
+
+    if config.user_agent:
+        arguments.append(f"--user-agent={USER_AGENT}")
+
+    if config.incognito:
+        arguments.append("--incognito")
+
+    if config.experimentals:
+        arguments.append("--disable-blink-features=AutomationControlled")
+
+    # Proxy without autentication
+    if config.proxy_server and config.proxy_port and not config.proxy_extension:
+        arguments.append(f"--proxy-server={config.proxy_server}:{config.proxy_port}")
+
+    # Each instance can use its own profile
+    if config.chrome_folder:
+        arguments.append(f"--user-data-dir={config.chrome_folder}")
+
+    # Open debugging port to reattach in the next starts
+    if config.debugger_address:
+        port = config.debugger_address.split(":")[-1]
+        arguments.append(f"--remote-debugging-port={port}")
+
+    return tuple(arguments)
@@ -0,0 +1,141 @@
+import threading
+
+from rich import print
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+
+from libs.web_scraping import WebScraping
+
+
+class BrowserPool ():
+    """
+    Keep a hot standby browser, already logged in and parked on the target
+    pages, to replace the active one when it crashes: failover only swaps
+    the scraper of the attached clients, and the dead browser is replaced
+    by a new standby in background.
+    Each browser needs its own chrome profile folder.
+    """
+
+    def __init__(self, create_scraper, warm_up=None) -> None:
+        """ Start active browser and build the standby one in background
+
+        Args:
+            create_scraper (function): function who receives a slot (0 or 1,
+                each slot with its own chrome profile) and returns a new WebScraping
+            warm_up (function, optional): function who receives a new scraper
+                and opens (and validates) the target pages. Defaults to None.
+        """
+
+        self.create_scraper = create_scraper
+        self.warm_up = warm_up
+
+        self.active_slot = 0
+        self.active = create_scraper(self.active_slot)
+        self.standby = None
+        self.clients = []
+
+        self.lock = threading.Lock()
+        self.standby_thread = None
+        self.__build_standby_background__()
+
+    def attach(self, client):
+        """ Register an object who uses the active scraper (in its "scraper"
+        attribute), to update it in failovers
+
+        Args:
+            client (object): object with scraper attribute
+        """
+
+        self.clients.append(client)
+
+    def __build_standby__(self):
+        """ Start and warm up a new standby browser """
+
+        print("\nStarting standby browser...")
+        scraper = None
+        try:
+            scraper = self.create_scraper(1 - self.active_slot)
+            if self.warm_up:
+                self.warm_up(scraper)
+            self.standby = scraper
+            print("Standby browser ready.")
+        except Exception as error:
+            print(f"Error starting standby browser: {error}")
+            if scraper:
+                self.__end_scraper__(scraper)
+
+    def __build_standby_background__(self):
+        """ Build standby browser in a background thread """
+
+        self.standby_thread = threading.Thread(target=self.__build_standby__, daemon=True)
+        self.standby_thread.start()
+
+    def __end_scraper__(self, scraper: WebScraping):
+        """ Close a (maybe dead) browser, ignoring errors
+
+        Args:
+            scraper (WebScraping): scraper to close
+        """
+
+        try:
+            scraper.end_browser()
+        except Exception:
+            pass
+
+    def is_dead(self, error: Exception = None) -> bool:
+        """ Check if the active browser session is dead (and not only a
+        page error, like timeouts or js errors)
+
+        Args:
+            error (Exception, optional): error raised by the active browser. Defaults to None.
+
+        Returns:
+            bool: True if the active browser must be replaced
+        """
+
+        if isinstance(error, InvalidSessionIdException) or not self.active.driver:
+            return True
+
+        try:
+            self.active.driver.window_handles
+            return False
+        except WebDriverException:
+            return True
+
+    def failover(self) -> WebScraping:
+        """ Replace active browser with the standby one
+
+        Returns:
+            WebScraping: new active scraper
+        """
+
+        with self.lock:
+            print("\nBrowser failed. Switching to standby browser...")
+
+            # Standby still starting: wait for it (or build it now)
+            if self.standby_thread and self.standby_thread.is_alive():
+                self.standby_thread.join()
+            if not self.standby:
+                self.__build_standby__()
+            if not self.standby:
+                raise Exception("Standby browser not available")
+
+            dead = self.active
+            self.active = self.standby
+            self.active_slot = 1 - self.active_slot
+            self.standby = None
+
+            # Point clients to the new browser
+            for client in self.clients:
+                client.scraper = self.active
+                if hasattr(client, "reset_tabs"):
+                    client.reset_tabs()
+
+            # Replace dead browser in background (in the free slot)
+            def replace_dead():
+                self.__end_scraper__(dead)
+                self.__build_standby__()
+
+            self.standby_thread = threading.Thread(target=replace_dead, daemon=True)
+            self.standby_thread.start()
+
+            return self.active
@@ -0,0 +1,144 @@
+import json
+import threading
+from itertools import count
+from urllib.request import urlopen
+
+import websocket
+from selenium.common.exceptions import WebDriverException
+
+from libs.latency_tracker import latency
+
+
+class CdpChannel ():
+    """
+    Direct connection to the DevTools websocket of a chrome tab, to run
+    hot path scripts without the chromedriver http round trip
+    """
+
+    def __init__(self, debugger_address: str, target_id: str, time_out: float = 10) -> None:
+        """ Connect to the tab websocket
+
+        Args:
+            debugger_address (str): chrome debugger host and port
+            target_id (str): tab target id (the selenium window handle)
+            time_out (float, optional): seconds to wait each command. Defaults to 10.
+        """
+
+        self.target_id = target_id
+        self.ids = count(1)
+        self.lock = threading.Lock()
+
+        # Global object of the page, to call functions on it
+        self.window_id = None
+
+        url = f"http://{debugger_address}/json/list"
+        with urlopen(url, timeout=time_out) as response:
+            targets = json.loads(response.read())
+        target = next((target for target in targets if target["id"] == target_id), None)
+        if not target:
+            raise WebDriverException(f"Tab not found in devtools: {target_id}")
+
+        # Chrome rejects websocket origins not allowed in its flags
+        self.socket = websocket.create_connection(
+            target["webSocketDebuggerUrl"],
+            timeout=time_out,
+            suppress_origin=True,
+        )
+
+    def send(self, method: str, params: dict = {}) -> dict:
+        """ Send a CDP command and wait its response (ignoring events)
+
+        Args:
+            method (str): CDP method
+            params (dict, optional): method params. Defaults to {}.
+
+        Returns:
+            dict: command result
+        """
+
+        with self.lock, latency.timer(f"cdp.{method}"):
+            command_id = next(self.ids)
+            self.socket.send(json.dumps({"id": command_id, "method": method, "params": params}))
+            while True:
+                message = json.loads(self.socket.recv())
+                if message.get("id") == command_id:
+                    break
+
+        if "error" in message:
+            raise WebDriverException(message["error"].get("message", ""))
+        return message["result"]
+
+    def __get_value__(self, result: dict):
+        """ Return the value of a Runtime result, raising script errors
+
+        Args:
+            result (dict): Runtime.evaluate or Runtime.callFunctionOn result
+
+        Returns:
+            any: script value
+        """
+
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            error = details.get("exception", {}).get("description", details.get("text", ""))
+            raise WebDriverException(f"javascript error: {error}")
+        return result["result"].get("value")
+
+    def evaluate(self, expression: str, await_promise: bool = False):
+        """ Evaluate a js expression in the page
+
+        Args:
+            expression (str): js expression
+            await_promise (bool, optional): wait the promise returned by the
+                expression. Defaults to False.
+
+        Returns:
+            any: expression value
+        """
+
+        result = self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        return self.__get_value__(result)
+
+    def call_function(self, function: str, *args):
+        """ Call a js function on the page window, with json arguments
+
+        Args:
+            function (str): js function declaration
+            args: function arguments
+
+        Returns:
+            any: function value
+        """
+
+        params = {
+            "functionDeclaration": function,
+            "arguments": [{"value": arg} for arg in args],
+            "returnByValue": True,
+        }
+
+        # Window object changes after each navigation: get it again
+        for retry in (False, True):
+            if not self.window_id or retry:
+                window = self.send("Runtime.evaluate", {"expression": "window"})
+                self.window_id = window["result"]["objectId"]
+            try:
+                result = self.send("Runtime.callFunctionOn", {
+                    **params,
+                    "objectId": self.window_id,
+                })
+                return self.__get_value__(result)
+            except WebDriverException as error:
+                if retry or "javascript error" in str(error):
+                    raise
+
+    def close(self):
+        """ Close websocket connection """
+
+        try:
+            self.socket.close()
+        except Exception:
+            pass
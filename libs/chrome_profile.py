@@ -0,0 +1,91 @@
+import os
+import shutil
+import socket
+
+from rich import print
+
+# Login data of a chrome profile (cookies are encrypted with the key in "Local State")
+PROFILE_FILES = [
+    "Local State",
+    os.path.join("Default", "Cookies"),
+    os.path.join("Default", "Network", "Cookies"),
+]
+PROFILE_FOLDERS = [
+    os.path.join("Default", "Local Storage"),
+]
+# Debugging port saved in each profile (chrome writes the port it opened in "DevToolsActivePort")
+DEBUG_PORT_FILE = "debug_port"
+
+
+def build_profile(source_folder: str, profile_folder: str, refresh: bool = False) -> str:
+    """ Create a small dedicated chrome profile, with only the login data
+    (cookies and local storage) of the user's profile, to start chrome faster
+    than with the full "User Data" folder
+
+    Args:
+        source_folder (str): user's chrome "User Data" folder
+        profile_folder (str): dedicated profile folder
+        refresh (bool, optional): copy the login data again, if the profile
+            already exists. Defaults to False.
+
+    Returns:
+        str: dedicated profile folder (absolute path)
+    """
+
+    profile_folder = os.path.abspath(profile_folder)
+    if os.path.exists(os.path.join(profile_folder, "Local State")) and not refresh:
+        return profile_folder
+
+    print("Creating chrome profile...")
+
+    for file in PROFILE_FILES:
+        source = os.path.join(source_folder, file)
+        if not os.path.exists(source):
+            continue
+        target = os.path.join(profile_folder, file)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            shutil.copy2(source, target)
+        except OSError as error:
+            print(f"Error copying {file} (close chrome and try again): {error}")
+
+    for folder in PROFILE_FOLDERS:
+        source = os.path.join(source_folder, folder)
+        if not os.path.exists(source):
+            continue
+        shutil.copytree(
+            source,
+            os.path.join(profile_folder, folder),
+            ignore=shutil.ignore_patterns("LOCK"),
+            dirs_exist_ok=True,
+        )
+
+    return profile_folder
+
+
+def get_debug_port(profile_folder: str) -> int:
+    """ Return the debugging port of a profile: a free port is picked the
+    first time and saved in the profile, so each instance keeps its own port
+
+    Args:
+        profile_folder (str): chrome profile folder
+
+    Returns:
+        int: debugging port
+    """
+
+    port_path = os.path.join(profile_folder, DEBUG_PORT_FILE)
+    if os.path.exists(port_path):
+        with open(port_path) as file:
+            port = file.read().strip()
+        if port.isdigit():
+            return int(port)
+
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+
+    os.makedirs(profile_folder, exist_ok=True)
+    with open(port_path, "w") as file:
+        file.write(str(port))
+    return port
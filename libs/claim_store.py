@@ -0,0 +1,209 @@
+import sqlite3
+import threading
+from time import sleep, time
+
+
+class ClaimStore ():
+    """
+    Store shared by many bot instances: detectors publish the order ids
+    found in Discord, and workers read them and claim each order before
+    accepting it, so two workers never accept the same order.
+    """
+
+    def publish(self, order_ids: list):
+        """ Share new order ids with the workers
+
+        Args:
+            order_ids (list): order ids found in Discord
+        """
+
+        raise NotImplementedError
+
+    def get_last_id(self) -> str:
+        """ Return the position of the last published order id, to read
+        only the next ones
+
+        Returns:
+            str: last position
+        """
+
+        raise NotImplementedError
+
+    def read_order_ids(self, last_id: str, wait_time: float = 1) -> tuple:
+        """ Wait for the order ids published after a position
+
+        Args:
+            last_id (str): last position read
+            wait_time (float, optional): max seconds to wait. Defaults to 1.
+
+        Returns:
+            tuple: new order ids (list) and new last position (str)
+        """
+
+        raise NotImplementedError
+
+    def claim(self, order_id: str, owner: str, ttl: float = 600) -> bool:
+        """ Reserve an order for a worker (claims expire after the ttl)
+
+        Args:
+            order_id (str): order id
+            owner (str): worker id
+            ttl (float, optional): seconds to keep the claim. Defaults to 600.
+
+        Returns:
+            bool: True if the order was claimed by this worker
+        """
+
+        raise NotImplementedError
+
+
+class SqliteClaimStore (ClaimStore):
+    """
+    Claim store in a local sqlite file (for instances in the same machine):
+    sqlite file locks make each claim atomic between processes
+    """
+
+    def __init__(self, path: str = "claims.db", keep_time: float = 3600) -> None:
+        """ Open database and create tables
+
+        Args:
+            path (str, optional): database file. Defaults to "claims.db".
+            keep_time (float, optional): seconds to keep published order ids. Defaults to 3600.
+        """
+
+        self.keep_time = keep_time
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(
+            path,
+            timeout=10,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    order_id TEXT NOT NULL,
+                    created REAL NOT NULL
+                )
+            """)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS claims (
+                    order_id TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            """)
+
+    def publish(self, order_ids: list):
+        now = time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO orders (order_id, created) VALUES (?, ?)",
+                [(order_id, now) for order_id in order_ids]
+            )
+            self.connection.execute(
+                "DELETE FROM orders WHERE created < ?", (now - self.keep_time,)
+            )
+
+    def get_last_id(self) -> str:
+        with self.lock:
+            row = self.connection.execute("SELECT COALESCE(MAX(seq), 0) FROM orders").fetchone()
+        return str(row[0])
+
+    def read_order_ids(self, last_id: str, wait_time: float = 1) -> tuple:
+        end_time = time() + wait_time
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT seq, order_id FROM orders WHERE seq > ? ORDER BY seq",
+                    (int(last_id),)
+                ).fetchall()
+            if rows:
+                return [row[1] for row in rows], str(rows[-1][0])
+            if time() >= end_time:
+                return [], last_id
+            sleep(0.02)
+
+    def claim(self, order_id: str, owner: str, ttl: float = 600) -> bool:
+        now = time()
+        with self.lock:
+            cursor = self.connection.execute("""
+                INSERT INTO claims (order_id, owner, expires) VALUES (?, ?, ?)
+                ON CONFLICT (order_id) DO UPDATE
+                SET owner = excluded.owner, expires = excluded.expires
+                WHERE claims.expires < ?
+            """, (order_id, owner, now + ttl, now))
+        return cursor.rowcount == 1
+
+
+class RedisClaimStore (ClaimStore):
+    """
+    Claim store in redis (or any redis compatible server), for instances
+    in many machines: order ids are published in a stream, and claims are
+    keys set only if they don't exist
+    """
+
+    def __init__(self, url: str, stream: str = "orders", max_len: int = 10000) -> None:
+        """ Connect to redis
+
+        Args:
+            url (str): redis url, like "redis://localhost:6379/0"
+            stream (str, optional): stream of order ids. Defaults to "orders".
+            max_len (int, optional): order ids to keep in the stream. Defaults to 10000.
+        """
+
+        # Optional dependency, only needed for this store
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.stream = stream
+        self.max_len = max_len
+
+    def publish(self, order_ids: list):
+        pipeline = self.client.pipeline()
+        for order_id in order_ids:
+            pipeline.xadd(
+                self.stream,
+                {"order_id": order_id},
+                maxlen=self.max_len,
+                approximate=True,
+            )
+        pipeline.execute()
+
+    def get_last_id(self) -> str:
+        entries = self.client.xrevrange(self.stream, count=1)
+        return entries[0][0] if entries else "0-0"
+
+    def read_order_ids(self, last_id: str, wait_time: float = 1) -> tuple:
+        response = self.client.xread(
+            {self.stream: last_id},
+            count=100,
+            block=int(wait_time * 1000),
+        )
+        if not response:
+            return [], last_id
+
+        entries = response[0][1]
+        return [entry[1]["order_id"] for entry in entries], entries[-1][0]
+
+    def claim(self, order_id: str, owner: str, ttl: float = 600) -> bool:
+        claimed = self.client.set(f"claim:{order_id}", owner, nx=True, ex=int(ttl))
+        return bool(claimed)
+
+
+def get_claim_store(url: str) -> ClaimStore:
+    """ Create the claim store of an url
+
+    Args:
+        url (str): "redis://..." (or "rediss://...") for redis, or sqlite file path
+
+    Returns:
+        ClaimStore: claim store
+    """
+
+    if url.startswith(("redis://", "rediss://")):
+        return RedisClaimStore(url)
+    return SqliteClaimStore(url)
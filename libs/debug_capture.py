@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from queue import Queue
+
+from libs.web_scraping import WebScraping
+
+
+class DebugCapture ():
+    """
+    Save html and screenshot snapshots of the page for debugging, off the
+    hot path: the page is read after accepting orders, and the files are
+    written by a background thread, keeping only the last snapshots.
+    """
+
+    def __init__(self, scraper: WebScraping, folder: str = "debug",
+                 mode: str = "failure", max_snapshots: int = 20,
+                 max_bytes: int = 50 * 1024 * 1024) -> None:
+        """ Start writer thread
+
+        Args:
+            scraper (WebScraping): scraper instance
+            folder (str, optional): snapshots folder. Defaults to "debug".
+            mode (str, optional): "always" (after each accept loop), "failure"
+                (only when orders couldn't be accepted) or "off". Defaults to "failure".
+            max_snapshots (int, optional): snapshots to keep. Defaults to 20.
+            max_bytes (int, optional): max size of the saved snapshots. Defaults to 50 MB.
+        """
+
+        self.scraper = scraper
+        self.folder = folder
+        self.mode = mode
+        self.max_snapshots = max_snapshots
+        self.max_bytes = max_bytes
+
+        # Saved snapshots (oldest first): (files paths, size)
+        self.snapshots = deque()
+        self.total_bytes = 0
+
+        os.makedirs(self.folder, exist_ok=True)
+
+        self.queue = Queue()
+        self.thread = threading.Thread(target=self.__write_snapshots__, daemon=True)
+        self.thread.start()
+
+    def capture(self, label: str, failed: bool = False):
+        """ Read current page and queue it to be saved
+
+        Args:
+            label (str): snapshot name
+            failed (bool, optional): capture is from a failure. Defaults to False.
+        """
+
+        if self.mode == "off" or (self.mode == "failure" and not failed):
+            return
+
+        try:
+            html = self.scraper.driver.page_source
+            png = self.scraper.driver.get_screenshot_as_png()
+        except Exception as e:
+            self.scraper.logger.error(f"Failed to capture page: {e}")
+            return
+
+        self.queue.put((label, html, png))
+
+    def __write_snapshots__(self):
+        """ Write queued snapshots and remove the old ones """
+
+        while True:
+            label, html, png = self.queue.get()
+            try:
+                self.__save_snapshot__(label, html, png)
+            except Exception as e:
+                self.scraper.logger.error(f"Failed to save snapshot: {e}")
+            finally:
+                self.queue.task_done()
+
+    def __save_snapshot__(self, label: str, html: str, png: bytes):
+        """ Save snapshot files, keeping the limits of snapshots and size
+
+        Args:
+            label (str): snapshot name
+            html (str): page html
+            png (bytes): page screenshot
+        """
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        base_path = os.path.join(self.folder, f"{timestamp}_{label}")
+
+        html_data = html.encode("utf-8")
+        with open(f"{base_path}.html", "wb") as file:
+            file.write(html_data)
+        with open(f"{base_path}.png", "wb") as file:
+            file.write(png)
+
+        size = len(html_data) + len(png)
+        self.snapshots.append(([f"{base_path}.html", f"{base_path}.png"], size))
+        self.total_bytes += size
+
+        # Remove oldest snapshots (always keep the last one)
+        while len(self.snapshots) > 1 and (
+            len(self.snapshots) > self.max_snapshots or self.total_bytes > self.max_bytes
+        ):
+            paths, size = self.snapshots.popleft()
+            self.total_bytes -= size
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def flush(self):
+        """ Wait until all queued snapshots are saved """
+
+        self.queue.join()
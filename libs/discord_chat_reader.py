@@ -1,14 +1,26 @@
-from time import sleep
+from time import perf_counter, sleep, time
 
 from rich import print
 
 from libs.web_scraping import WebScraping
+from libs.order_message_parser import OrderMessageParser
+from libs.seen_index import SeenIndex
+from libs.message_sources import MessageSource
+from libs.order_ledger import OrderLedger
+from libs.latency_tracker import latency
+from libs.memory_governor import MemoryGovernor
 
 
 class DiscordChatReader ():
     
     def __init__(self, scraper: WebScraping, server_link: str,
-                 channels_names: list, keywords: list) -> None:
+                 channels_names: list, keywords: list,
+                 push_mode: bool = False, push_wait: float = 5,
+                 parallel_mode: bool = False, keep_tab_open: bool = False,
+                 message_source: MessageSource = None,
+                 ledger: OrderLedger = None,
+                 memory_governor: MemoryGovernor = None,
+                 poll_wait: float = 1) -> None:
         """_summary_
 
         Args:
@@ -16,6 +28,26 @@ class DiscordChatReader ():
             channel_link (str): channel link
             channels_names (list): list of channels names
             keywords (list): list of keywords to search in messages
+            push_mode (bool, optional): capture new messages with an in-page
+                MutationObserver instead of polling the DOM. Defaults to False.
+            push_wait (float, optional): seconds to listen each channel in
+                push mode before moving to the next one. Defaults to 5.
+            parallel_mode (bool, optional): keep each channel open in its
+                own tab, with its own observer, and read all of them in
+                round-robin. Defaults to False.
+            keep_tab_open (bool, optional): keep discord tabs alive between
+                cycles, and reload them only when they are not healthy.
+                Defaults to False.
+            message_source (MessageSource, optional): alternative source of
+                new messages (like the gateway websocket), instead of reading
+                the channels in the page. Defaults to None.
+            ledger (OrderLedger, optional): orders states shared with the
+                boostingfactory scraper. Defaults to None (new ledger).
+            memory_governor (MemoryGovernor, optional): prune old messages of
+                the kept tabs, and reload them when they use too much memory.
+                Defaults to None.
+            poll_wait (float, optional): seconds to wait between reads of all
+                the channels, when push mode is off. Defaults to 1.
         """
 
         # Settigns
@@ -23,35 +55,178 @@ class DiscordChatReader ():
         self.server_link = server_link
         self.channels_names = channels_names
         self.keywords = keywords
+        self.message_parser = OrderMessageParser(keywords)
+        self.push_mode = push_mode
+        self.push_wait = push_wait
+        self.parallel_mode = parallel_mode
+        self.keep_tab_open = keep_tab_open
+        self.message_source = message_source
+        self.ledger = ledger if ledger else OrderLedger()
+        self.memory_governor = memory_governor
+        self.poll_wait = poll_wait
+        
+        # Css selectors
+        self.selectors = {
+            "chat": '[data-list-id="chat-messages"]',
+            "message": 'h3 + div',
+            "channels": '[data-dnd-name]',
+        }
         
         # Saved data
-        self.saved_messages = []
+        self.saved_messages = SeenIndex(max_size=5000)
         self.order_ids = []
+        self.channels_tabs = {}
+        self.tab_handle = None
             
     def __load_page__(self):
         """ Load main page in new tab
         """
         
-        # Open page in new tab
-        tabs_num = self.scraper.driver.window_handles
-        if len(tabs_num) > 1:
+        # Close old discord tab
+        tabs = self.scraper.driver.window_handles
+        if self.tab_handle in tabs:
+            self.scraper.switch_to_handle(self.tab_handle)
+            self.scraper.close_tab()
+        elif len(tabs) > 1:
             self.scraper.switch_to_tab(1)
             self.scraper.close_tab()
+            
+        # Open page in new tab
         self.scraper.switch_to_tab(0)
         self.scraper.open_tab()
-        self.scraper.switch_to_tab(1)
+        tabs = self.scraper.driver.window_handles
+        self.tab_handle = tabs[-1]
+        self.scraper.switch_to_handle(self.tab_handle)
             
         # Open server link
+        self.__reload_tab__()
+        
+    def __load_source_page__(self):
+        """ Keep discord page open for the message source, reloading it
+        only when it's not healthy
+        """
+        
+        if not self.__is_tab_healthy__(self.tab_handle):
+            self.__load_page__()
+        self.message_source.start()
+        
+    def __is_tab_healthy__(self, handle: str) -> bool:
+        """ Check if a discord tab is still open, logged and loaded
+        (and switch to it)
+        
+        Args:
+            handle (str): tab window handle
+            
+        Returns:
+            bool: True if the tab can be used without reload
+        """
+        
+        if not handle or handle not in self.scraper.driver.window_handles:
+            return False
+        self.scraper.switch_to_handle(handle)
+        
+        current_url = self.scraper.driver.current_url
+        if "/login" in current_url or not current_url.startswith(self.server_link):
+            return False
+        
+        code = "return !!document.querySelector(arguments[0]);"
+        return self.scraper.run_script(code, self.selectors["channels"])
+        
+    def __reload_tab__(self):
+        """ Open server link in current tab """
+        
         self.scraper.set_page(self.server_link)
+        self.scraper.wait_for_selector(self.selectors["channels"], time_out=30)
         self.scraper.zoom(50)
-        sleep(8)
-        self.scraper.refresh_selenium(back_tab=1)
+        
+    def __load_channels_tabs__(self):
+        """ Open each channel in its own tab, with its own observer
+        """
+        
+        # Close old discord tabs (the single discord tab too)
+        self.__close_channels_tabs__()
+        
+        for channel_name in self.channels_names:
+            
+            # Open server link in new tab
+            self.scraper.switch_to_tab(0)
+            self.scraper.open_tab()
+            tab_index = len(self.scraper.driver.window_handles) - 1
+            self.scraper.switch_to_tab(tab_index)
+            self.__reload_tab__()
             
-    def __load_channel__(self, channel_name: str):
+            # Open channel and start listening
+            self.__load_channel__(channel_name, observe=True)
+            self.__inject_observer__()
+            handle = self.scraper.driver.current_window_handle
+            self.channels_tabs[channel_name] = handle
+            
+    def __close_channels_tabs__(self):
+        """ Close all discord tabs and return to boostingfactory tab """
+        
+        tabs = self.scraper.driver.window_handles
+        for tab in tabs[1:]:
+            self.scraper.switch_to_handle(tab)
+            self.scraper.close_tab()
+        self.scraper.switch_to_tab(0)
+        self.channels_tabs = {}
+        self.tab_handle = None
+        
+    def __listen_channels_tabs__(self):
+        """ Read the observers queues of all channels tabs in round-robin,
+        until order ids are found
+        """
+        
+        while not self.order_ids:
+            self.__check_memory__()
+            self.__sweep_channels_tabs__()
+            if not self.order_ids:
+                sleep(0.05)
+                
+    def __sweep_channels_tabs__(self):
+        """ Read once, without waiting, the observers queues of all
+        channels tabs
+        """
+        
+        for channel_name, handle in self.channels_tabs.items():
+            self.scraper.switch_to_handle(handle)
+            
+            # Non blocking read
+            messages = self.__drain_messages__(0)
+            if messages:
+                print(f"\nNew messages in channel '{channel_name}'")
+                self.__save_new_order_ids__(messages)
+            
+    def __check_memory__(self):
+        """ Keep memory of the open discord tabs bounded (reloading them
+        only if pruning old messages is not enough)
+        """
+        
+        if not self.memory_governor:
+            return
+        
+        if self.channels_tabs:
+            
+            # Reload only the tabs over the limits (the other tabs keep
+            # their queued messages)
+            for channel_name, handle in list(self.channels_tabs.items()):
+                if self.memory_governor.check(handle):
+                    self.scraper.switch_to_handle(handle)
+                    self.__reload_tab__()
+                    self.__load_channel__(channel_name, observe=True)
+                    self.__inject_observer__()
+            return
+        
+        if self.tab_handle and self.memory_governor.check(self.tab_handle):
+            self.__reload_tab__()
+    
+    def __load_channel__(self, channel_name: str, observe: bool = False):
         """ Load specific channel and scroll to the bottom
         
         Args:
             channel_name (str): channel name
+            observe (bool, optional): save the last message of the channel,
+                for its observer. Defaults to False.
         """
         
         print(f"\nLoading channel '{channel_name}'...")
@@ -63,14 +238,30 @@ class DiscordChatReader ():
         # Open chat
         try:
             # Click using js
-            script = f"""document.querySelector('{selectors["channel"]}').click();"""
-            self.scraper.driver.execute_script(script)
-            sleep(1)
+            script = f"""
+                const link = document.querySelector('{selectors["channel"]}');
+                link.click();
+                return link.href.split('/').pop();
+            """
+            with latency.timer("discord.load_channel"):
+                channel_id = self.scraper.run_script(script)
+                
+                # Wait for channel messages
+                selector_messages = f'{self.selectors["chat"]} > ' \
+                                    f'li[id^="chat-messages-{channel_id}-"]'
+                self.scraper.wait_for_selector(selector_messages, time_out=5)
+                
+                # Observer starts from the last message of the channel
+                if observe:
+                    self.__set_last_message__(channel_id)
         except Exception:
             print(f"\tError opening channel '{channel_name}'. Retrying in 5 seconds...")
             sleep(5)
-            self.__load_page__()
-            self.__load_channel__(channel_name)
+            if self.parallel_mode:
+                self.__reload_tab__()
+            else:
+                self.__load_page__()
+            self.__load_channel__(channel_name, observe)
     
     def __get_messages__(self) -> list[str]:
         """ Read last @everyone visible messages in current channel
@@ -80,10 +271,9 @@ class DiscordChatReader ():
         """
         
         selectors = {
-            "message": '[data-list-id="chat-messages"] > '
-                       'li:nth-last-child(-n+8) h3 + div',
+            "message": f'{self.selectors["chat"]} > '
+                       f'li:nth-last-child(-n+8) {self.selectors["message"]}',
         }
-        self.scraper.refresh_selenium(back_tab=1)
         
         # Get messages with js script
         code = f"""
@@ -91,9 +281,21 @@ class DiscordChatReader ():
             var messagesText = Array.from(messages).map(message => message.textContent);
             return messagesText;
         """
-        messages = self.scraper.driver.execute_script(code)
-
-        # Get only @everyone messages and remove new lines
+        with latency.timer("discord.get_messages"):
+            messages = self.scraper.run_script(code)
+        
+        return self.__clean_messages__(messages)
+    
+    def __clean_messages__(self, messages: list[str]) -> list[str]:
+        """ Keep only @everyone messages, without new lines and in lower case
+        
+        Args:
+            messages (list[str]): raw messages text
+            
+        Returns:
+            list[str]: clean messages
+        """
+        
         messages = list(filter(lambda message: "@everyone" in message, messages))
         messages = list(map(
             lambda message: message.replace("\n", " ").lower(),
@@ -102,51 +304,263 @@ class DiscordChatReader ():
         
         return messages
     
-    def __save_new_order_ids__(self):
+    def __inject_observer__(self):
+        """ Inject a MutationObserver in the page, who buffer the new
+        @everyone messages in a js queue (window.botMessages).
+        Visible messages are queued too, to don't lose messages posted
+        before the observer starts, but the history rendered when a
+        channel is opened is skipped (only messages newer than the last
+        one of each loaded channel are queued).
+        """
+        
+        code = """
+            if (window.botObserver) {
+                return;
+            }
+            
+            const chatSelector = arguments[0];
+            const messageSelector = arguments[1];
+            
+            const queueMessage = (li) => {
+                const message = li.querySelector(messageSelector);
+                if (!message || !message.textContent.includes('@everyone')) {
+                    return;
+                }
+                window.botMessages.push(message.textContent);
+                if (window.botWaiter) {
+                    window.botWaiter();
+                }
+            };
+            
+            // Channel and message ids of "chat-messages-{channel}-{message}"
+            const getIds = (li) => {
+                const match = /^chat-messages-(\d+)-(\d+)$/.exec(li.id);
+                return match ? [match[1], BigInt(match[2])] : [null, null];
+            };
+            
+            window.botMessages = [];
+            window.botWaiter = null;
+            window.botQueueMessage = queueMessage;
+            
+            // Last message of each channel (message ids grow over time),
+            // saved when the channels are loaded
+            window.botLastIds = window.botLastIds || {};
+            
+            // Last visible messages
+            const visible = document.querySelectorAll(
+                `${chatSelector} > li:nth-last-child(-n+8)`
+            );
+            visible.forEach(queueMessage);
+            if (visible.length) {
+                const [channelId, messageId] = getIds(visible[visible.length - 1]);
+                if (channelId !== null && !(channelId in window.botLastIds)) {
+                    window.botLastIds[channelId] = messageId;
+                }
+            }
+            
+            // New messages (the chat list is replaced when channel changes,
+            // so the whole body is observed, and messages can be inside
+            // added containers)
+            window.botObserver = new MutationObserver(mutations => {
+                for (const mutation of mutations) {
+                    for (const node of mutation.addedNodes) {
+                        if (node.nodeType !== Node.ELEMENT_NODE) {
+                            continue;
+                        }
+                        const items = node.nodeName === 'LI'
+                            ? [node] : node.querySelectorAll('li');
+                        for (const li of items) {
+                            if (!li.closest(chatSelector)) {
+                                continue;
+                            }
+                            const [channelId, messageId] = getIds(li);
+                            
+                            // History of channels not loaded yet is skipped
+                            if (channelId === null || !(channelId in window.botLastIds)) {
+                                continue;
+                            }
+                            if (messageId <= window.botLastIds[channelId]) {
+                                continue;
+                            }
+                            window.botLastIds[channelId] = messageId;
+                            queueMessage(li);
+                        }
+                    }
+                }
+            });
+            window.botObserver.observe(
+                document.body, {childList: true, subtree: true}
+            );
+        """
+        self.scraper.driver.execute_script(
+            code, self.selectors["chat"], self.selectors["message"]
+        )
+        
+        # Allow long polls up to the channel wait time
+        self.scraper.driver.set_script_timeout(self.push_wait + 5)
+    
+    def __set_last_message__(self, channel_id: str):
+        """ Save the last rendered message of a loaded channel, so the
+        observer only queues newer ones. Messages newer than the previous
+        last message of the channel (posted while it was closed) are queued.
+        
+        Args:
+            channel_id (str): channel id
+        """
+        
+        code = """
+            const chatSelector = arguments[0];
+            const channelId = arguments[1];
+            
+            window.botLastIds = window.botLastIds || {};
+            const items = document.querySelectorAll(
+                `${chatSelector} > li[id^="chat-messages-${channelId}-"]`
+            );
+            const lastId = channelId in window.botLastIds
+                ? window.botLastIds[channelId] : null;
+            
+            let maxId = lastId === null ? 0n : lastId;
+            for (const li of items) {
+                const match = /^chat-messages-\\d+-(\\d+)$/.exec(li.id);
+                if (!match) {
+                    continue;
+                }
+                const messageId = BigInt(match[1]);
+                if (messageId <= maxId) {
+                    continue;
+                }
+                maxId = messageId;
+                if (lastId !== null && window.botQueueMessage) {
+                    window.botQueueMessage(li);
+                }
+            }
+            window.botLastIds[channelId] = maxId;
+        """
+        self.scraper.run_script(code, self.selectors["chat"], channel_id)
+    
+    def __drain_messages__(self, wait_time: float) -> list[str]:
+        """ Long-poll the observer queue: return as soon as there are
+        new messages, or empty list after wait time
+        
+        Args:
+            wait_time (float): max seconds to wait for new messages
+            
+        Returns:
+            list[str]: new @everyone messages
+        """
+        
+        code = """
+            const timeout = arguments[0];
+            const done = arguments[arguments.length - 1];
+            
+            // Observer lost (page reloaded)
+            if (!window.botObserver) {
+                done(null);
+                return;
+            }
+            
+            const flush = () => {
+                const messages = window.botMessages;
+                window.botMessages = [];
+                window.botWaiter = null;
+                done(messages);
+            };
+            
+            if (window.botMessages.length || timeout <= 0) {
+                flush();
+                return;
+            }
+            window.botWaiter = flush;
+            setTimeout(() => {
+                if (window.botWaiter === flush) {
+                    flush();
+                }
+            }, timeout);
+        """
+        messages = self.scraper.driver.execute_async_script(
+            code, int(wait_time * 1000)
+        )
+        
+        # Inject observer again if page was reloaded
+        if messages is None:
+            self.__inject_observer__()
+            messages = []
+        
+        return self.__clean_messages__(messages)
+    
+    def __listen_channel__(self):
+        """ Listen new messages in current channel (push mode), until
+        order ids are found or the channel wait time ends
+        """
+        
+        self.__inject_observer__()
+        
+        end_time = time() + self.push_wait
+        while not self.order_ids:
+            wait_time = end_time - time()
+            if wait_time <= 0:
+                break
+            
+            messages = self.__drain_messages__(wait_time)
+            if messages:
+                self.__save_new_order_ids__(messages)
+    
+    def __save_new_order_ids__(self, messages: list[str] = None):
         """ Validate new messages and return their order ids
+        
+        Args:
+            messages (list[str], optional): messages to validate.
+                Defaults to None (read visible messages in current channel).
         """
         
         print("\tReading messages...")
                 
         # Get and validate each message
-        messages = self.__get_messages__()
+        if messages is None:
+            messages = self.__get_messages__()
+        start = perf_counter()
         for message in messages:
             
             # Skip saved messages
-            if message in self.saved_messages:
+            if self.saved_messages.check_and_add(message):
                 continue
-            self.saved_messages.append(message)
-            
-            # Validate mssage
-            keyword_found = False
-            for keyword in self.keywords:
-                
-                # Check if almost the most of the words are in the message
-                words_num = len(keyword.split(" "))
-                words_found = 0
-                for word in keyword.split(" "):
-                    if word in message:
-                        words_found += 1
-                
-                if words_found == words_num:
-                    print(f"\tNew message: {message}")
-                    keyword_found = True
-                    break
             
-            if not keyword_found:
+            # Validate mssage (all the words of a keyword in the message)
+            # and get its order ids
+            order = self.message_parser.parse(message)
+            if order["keyword"] is None:
                 continue
+            print(f"\tNew message: {message}")
+            
+            if not order["order_ids"]:
+                print("\tOrder id not found in message.")
+            for order_id in order["order_ids"]:
                 
-            # Get order id
-            message_parts = message.split("order id: ")
-            message_parts = message_parts[-1].split(" ")
-            order_id = message_parts[0]
-            self.order_ids.append(order_id)
+                # Skip pending and already accepted orders
+                if self.ledger.add_pending(order_id):
+                    self.order_ids.append(order_id)
+                    
+        latency.record("discord.save_new_order_ids", perf_counter() - start)
             
         if not self.order_ids:
             print("\tNo new orders found.")
                 
-    def validate_login(self):
-        """ Validate if user is logged in """
+    def reset_tabs(self):
+        """ Use the discord tab of a new browser (after failover), if it
+        was already opened
+        """
+        
+        tabs = self.scraper.driver.window_handles
+        self.tab_handle = tabs[1] if len(tabs) > 1 else None
+        self.channels_tabs = {}
+                
+    def validate_login(self, quit_on_error: bool = True):
+        """ Validate if user is logged in
+        
+        Args:
+            quit_on_error (bool, optional): end the bot if user is not
+                logged in (raise an exception if False). Defaults to True.
+        """
         
         print("Validating Discord login...")
                 
@@ -154,6 +568,8 @@ class DiscordChatReader ():
         current_url = self.scraper.driver.current_url
         if "/login" in current_url:
             print("Discord session expired. Login again in Chrome.")
+            if not quit_on_error:
+                raise Exception("Discord session expired")
             quit()
             
         print("Logged in Discord.")
@@ -169,24 +585,88 @@ class DiscordChatReader ():
         # Reset order ids
         self.order_ids = []
         
-        self.__load_page__()
+        # Read messages from the message source (page only keeps it alive)
+        if self.message_source:
+            self.__load_source_page__()
+            while not self.order_ids:
+                messages = self.message_source.read_messages(self.push_wait)
+                messages = self.__clean_messages__(messages)
+                if messages:
+                    self.__save_new_order_ids__(messages)
+            return
+        
+        # Read all channels at the same time
+        if self.parallel_mode:
+            handles = self.channels_tabs.values()
+            tabs_healthy = self.channels_tabs and all(map(self.__is_tab_healthy__, handles))
+            if not (self.keep_tab_open and tabs_healthy):
+                self.__load_channels_tabs__()
+            self.__listen_channels_tabs__()
+            if not self.keep_tab_open:
+                self.__close_channels_tabs__()
+            return
+        
+        # Reuse discord tab if it's still working
+        if not (self.keep_tab_open and self.__is_tab_healthy__(self.tab_handle)):
+            self.__load_page__()
         
         order_ids_found = False
         while not order_ids_found:
+            self.__check_memory__()
         
             # Get and validate channels
             for channels_name in self.channels_names:
                 # Load channel and read messages
-                self.__load_channel__(channels_name)
-                self.__save_new_order_ids__()
+                self.__load_channel__(channels_name, observe=self.push_mode)
+                if self.push_mode:
+                    self.__listen_channel__()
+                else:
+                    self.__save_new_order_ids__()
                 
                 # End loop if new orderids found
                 if self.order_ids:
                     
                     # Close discord tab and return to boostingfactory
-                    self.scraper.close_tab()
-                    self.scraper.switch_to_tab(0)
+                    # (boostingfactory selects its own tab by handle)
+                    if not self.keep_tab_open:
+                        self.scraper.close_tab()
+                        self.tab_handle = None
+                        self.scraper.switch_to_tab(0)
                     
                     # Update stus and end loop
                     order_ids_found = True
                     break
+            
+            # Wait before reading the channels again (push mode already
+            # waits for new messages in each channel)
+            if not order_ids_found and not self.push_mode:
+                sleep(self.poll_wait)
+                    
+    def start_watching(self):
+        """ Open all channels tabs (with their observers) and keep them open,
+        to read new order ids with collect_order_ids
+        """
+        
+        print("\nWatching channels...")
+        if self.message_source:
+            self.__load_source_page__()
+            return
+        self.__load_channels_tabs__()
+        
+    def collect_order_ids(self) -> list:
+        """ Read once, without waiting, the new order ids of all channels
+        (start_watching must be called before)
+        
+        Returns:
+            list: new order ids
+        """
+        
+        self.order_ids = []
+        if self.message_source:
+            messages = self.__clean_messages__(self.message_source.read_messages())
+            if messages:
+                self.__save_new_order_ids__(messages)
+        else:
+            self.__check_memory__()
+            self.__sweep_channels_tabs__()
+        return self.order_ids
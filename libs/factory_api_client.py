@@ -0,0 +1,170 @@
+import requests
+from requests.adapters import HTTPAdapter
+from rich import print
+from selenium.common.exceptions import WebDriverException
+
+from libs.web_scraping import WebScraping
+
+
+class FactoryApiClient ():
+    """
+    Call Boostingfactory orders endpoints directly, reusing the cookies of
+    the logged in chrome session, with a pooled keep-alive http session
+    """
+
+    def __init__(self, scraper: WebScraping, orders_url: str, accept_url: str,
+                 time_out: float = 5) -> None:
+        """ Create http session
+
+        Args:
+            scraper (WebScraping): scraper instance (logged in Boostingfactory)
+            orders_url (str): available orders endpoint
+            accept_url (str): accept order endpoint, with "{order_id}" placeholder
+            time_out (float, optional): seconds to wait each request. Defaults to 5.
+        """
+
+        self.scraper = scraper
+        self.orders_url = orders_url
+        self.accept_url = accept_url
+        self.time_out = time_out
+
+        self.csrf_token = ""
+        self.tab_handle = None
+
+        # Keep alive connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json, text/plain, */*",
+            "X-Requested-With": "XMLHttpRequest",
+        })
+
+    def load_session(self, tab_handle: str = None):
+        """ Copy cookies, user agent and csrf token from the Boostingfactory
+        tab, and return to the current tab
+
+        Args:
+            tab_handle (str, optional): Boostingfactory tab, saved for the
+                next reloads. Defaults to None (saved tab, or current tab).
+        """
+
+        if tab_handle:
+            self.tab_handle = tab_handle
+        driver = self.scraper.driver
+
+        # Move to Boostingfactory tab (discord tab can be the current one)
+        previous_handle = None
+        if self.tab_handle:
+            try:
+                previous_handle = driver.current_window_handle
+            except WebDriverException:
+                previous_handle = None
+            self.scraper.switch_to_handle(self.tab_handle)
+
+        try:
+            self.__copy_session__()
+        finally:
+            if previous_handle and previous_handle != self.tab_handle:
+                self.scraper.switch_to_handle(previous_handle)
+
+    def __copy_session__(self):
+        """ Copy cookies, user agent and csrf token from the current tab """
+
+        driver = self.scraper.driver
+
+        self.session.cookies.clear()
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+
+        user_agent = driver.execute_script("return navigator.userAgent")
+        self.session.headers["User-Agent"] = user_agent
+
+        # Laravel like csrf token
+        self.csrf_token = driver.execute_script("""
+            const meta = document.querySelector('meta[name="csrf-token"]');
+            return meta ? meta.content : '';
+        """)
+        if self.csrf_token:
+            self.session.headers["X-CSRF-TOKEN"] = self.csrf_token
+
+    def get_orders(self) -> list[dict]:
+        """ Get available orders
+
+        Returns:
+            list[dict]: orders data (with "id" as string)
+        """
+
+        response = self.session.get(self.orders_url, timeout=self.time_out)
+        response.raise_for_status()
+        orders = response.json()
+
+        # Orders can be wrapped in "data"
+        if isinstance(orders, dict):
+            orders = orders.get("data", [])
+
+        for order in orders:
+            order["id"] = str(order.get("id", "")).replace("#", "").strip()
+
+        return orders
+
+    def accept_order(self, order_id: str, retry: bool = True) -> bool:
+        """ Accept a single order
+
+        Args:
+            order_id (str): order id
+            retry (bool, optional): reload session and retry once if it
+                expired. Defaults to True.
+
+        Returns:
+            bool: True if the order was accepted (json response with success)
+        """
+
+        url = self.accept_url.format(order_id=order_id)
+        data = {"_token": self.csrf_token} if self.csrf_token else {}
+        response = self.session.post(
+            url, data=data, timeout=self.time_out, allow_redirects=False
+        )
+
+        # Session or csrf token expired (or redirect to login page)
+        if (response.status_code in (401, 419) or response.is_redirect) and retry:
+            self.load_session()
+            return self.accept_order(order_id, retry=False)
+
+        if not response.ok or response.is_redirect:
+            return False
+
+        # Only json responses confirm the order (html pages are login or errors)
+        try:
+            body = response.json()
+        except ValueError:
+            return False
+
+        return isinstance(body, dict) and bool(body.get("success"))
+
+    def accept_orders(self, order_ids: list) -> list:
+        """ Accept orders and return the accepted ones
+
+        Args:
+            order_ids (list): list of order ids
+
+        Returns:
+            list: order ids accepted
+        """
+
+        accepted = []
+        for order_id in order_ids:
+            try:
+                if self.accept_order(order_id):
+                    print(f"Order {order_id} accepted (api)")
+                    accepted.append(order_id)
+            except requests.RequestException as error:
+                print(f"Error accepting order {order_id} with api: {error}")
+
+        return accepted
@@ -1,101 +1,373 @@
-from time import sleep
+from time import perf_counter, sleep
 from rich import print
 
 from libs.web_scraping import WebScraping
+from libs.factory_api_client import FactoryApiClient
+from libs.order_ledger import OrderLedger
+from libs.debug_capture import DebugCapture
+from libs.latency_tracker import latency
 
 
 class FactoryScraper():
     def __init__(
         self,
         scraper: WebScraping,
+        accept_mode: str = "selenium",
+        api_client: FactoryApiClient = None,
+        ledger: OrderLedger = None,
+        debug_capture: DebugCapture = None,
     ) -> None:
         """starts chrome and initializes the scraper
 
         args:
             scraper: (WebScraping) instance of the scraper
+            accept_mode: (str) "selenium" to accept each order with webdriver
+                clicks, or "js" to find and accept all orders in a single
+                in-page script
+            api_client: (FactoryApiClient) optional http client to accept
+                orders without the browser (selenium is used as fallback)
+            ledger: (OrderLedger) orders states shared with the discord reader
+            debug_capture: (DebugCapture) optional snapshots of the orders page
         """
         
         self.scraper = scraper
+        self.accept_mode = accept_mode
+        self.api_client = api_client
+        self.ledger = ledger if ledger else OrderLedger()
+        self.debug_capture = debug_capture
         
         self.extracted_orders = {}
+        self.tab_handle = None
         
         self.home_page = "https://www.boostingfactory.com/profile"
         
-    def __load_page__(self):
-        """ Load main page """
-        
-        self.scraper.set_page(self.home_page)
-        self.scraper.zoom(50)
-        sleep(5)
-        self.scraper.refresh_selenium()
-
-    def loop_orders(self, order_ids: list) -> None:
-        """Loop through orders and stores it to be processed later.
-        
-        Args:
-            order_ids: (list) list of order ids
-        """
-        
-        print("\nLooping through orders...")
-
-        selectors = {
+        self.selectors = {
             "orders_tab": ".orders .nav.nav-tabs > li:first-child a",
+            "orders_list": "div#availableOrders",
             "orders": "div#availableOrders .orders-preloader + div",
             "order_button": "div#availableOrders div.single-order' \
                 '.order-detail-btn .btn-for-bright",
             "order_link": "a",
+            "order_title": "h3",
             "order_id": "h3 + span",
             "order_accept": "button.btn.order-accept-btn.btn-for-bright",
             "order_ok": ".answer-btn",
         }
+        
+    def __load_page__(self):
+        """ Load main page """
+        
+        self.scraper.set_page(self.home_page)
+        self.scraper.wait_for_network_idle()
+        self.scraper.zoom(50)
 
-        # Move to orders tab
-        self.scraper.click_js(selectors["orders_tab"])
-        self.scraper.click_js(selectors["orders_tab"])
+    def __get_orders__(self) -> list[dict]:
+        """ Read all available orders in a single js call
+        
+        Returns:
+            list[dict]: orders data (id, date, title and has_accept)
+        """
         
-        # Refresh fo new orders
-        for _ in range(10):
-            self.scraper.refresh_selenium(time_units=0.1)
-            orders = self.scraper.get_elems(selectors["orders"])
-            if orders:
-                break
+        code = """
+            const selectors = arguments[0];
+            const orders = document.querySelectorAll(selectors.orders);
+            return Array.from(orders).map(order => {
+                const idDate = order.querySelector(selectors.order_id);
+                const title = order.querySelector(selectors.order_title);
+                const parts = idDate ? idDate.innerText.split(' - ') : [''];
+                return {
+                    id: parts[parts.length - 1].replace('#', '').trim(),
+                    date: parts.length > 1 ? parts[0].trim() : '',
+                    title: title ? title.innerText.trim() : '',
+                    has_accept: !!order.querySelector(selectors.order_accept),
+                };
+            });
+        """
+        return self.scraper.run_script(code, self.selectors)
+
+    def __click_order_accept__(self, order_id: str) -> str:
+        """ Find the order by its id and click its accept button (the
+        orders list changes after each accepted order)
         
-        # Save page html
-        with open("orders.html", "w", encoding="utf-8") as file:
-            file.write(self.scraper.driver.page_source)
+        Args:
+            order_id: (str) order id
             
-        # Save page screenshot
-        self.scraper.screenshot("orders.png")
+        Returns:
+            str: "clicked", "no_accept_button" or "not_found"
+        """
+        
+        code = """
+            const selectors = arguments[0];
+            const orderId = arguments[1];
+            const orders = document.querySelectorAll(selectors.orders);
+            for (const order of orders) {
+                const idDate = order.querySelector(selectors.order_id);
+                if (!idDate) {
+                    continue;
+                }
+                const parts = idDate.innerText.split(' - ');
+                if (parts[parts.length - 1].replace('#', '').trim() !== orderId) {
+                    continue;
+                }
+                const accept = order.querySelector(selectors.order_accept);
+                if (!accept) {
+                    return 'no_accept_button';
+                }
+                accept.click();
+                return 'clicked';
+            }
+            return 'not_found';
+        """
+        return self.scraper.run_script(code, self.selectors, order_id)
+
+    def __accept_orders_selenium__(self, order_ids: list) -> int:
+        """ Accept the valid orders with webdriver clicks
+        
+        Args:
+            order_ids: (list) list of order ids
+            
+        Returns:
+            int: number of orders accepted
+        """
+        
+        selectors = self.selectors
+        
+        # Read all orders at once
+        with latency.timer("factory.get_orders"):
+            orders = self.__get_orders__()
 
         orders_accepted = 0
-        for order in range(0, len(orders)):
+        for order in orders:
 
-            # Validate order title
-            selector_order = f"{selectors['orders']}:nth-child({(order + 1) * 2})"
-            selector_id = f"{selector_order} {selectors['order_id']}"
-            order_id_date = self.scraper.get_elem(selector_id).text
-            
-            order_id_parts = order_id_date.split(" - ")
-            order_id = order_id_parts[-1]
-            order_id = order_id.replace("#", "").strip()
+            order_id = order["id"]
             
             # Validte order ids
             if order_id not in order_ids:
                 print(f"Order {order_id} not in valid order ids")
+                self.ledger.add_seen(order_id)
                 continue
 
-            # Accept order
-            self.scraper.click_js(f"{selector_order} {selectors['order_accept']}")
-            self.scraper.refresh_selenium()
-            self.scraper.click_js(f"{selectors['order_ok']}")
+            # Accept order (found again by id: accepted orders leave the list)
+            with latency.timer("factory.accept_click"):
+                status = self.__click_order_accept__(order_id)
+                if status != "clicked":
+                    print(f"Order {order_id} not accepted: {status}")
+                    
+                    # Orders removed from the list keep pending
+                    if status != "not_found":
+                        self.ledger.set_state(order_id, OrderLedger.FAILED)
+                    continue
+                confirmed = self.scraper.wait_for_visible(selectors['order_ok'], time_out=5)
+            if not confirmed:
+                print(f"Order {order_id} not accepted: no confirmation")
+                self.ledger.set_state(order_id, OrderLedger.FAILED)
+                continue
+            with latency.timer("factory.ok_click"):
+                self.scraper.click_js(f"{selectors['order_ok']}")
 
             print(f"Order {order_id} accepted")
+            self.ledger.set_state(order_id, OrderLedger.ACCEPTED)
             orders_accepted += 1
+            
+        return orders_accepted
+    
+    def __accept_orders_js__(self, order_ids: list, time_out: float = 5) -> int:
+        """ Find and accept all valid orders inside the page, in a single
+        js call: click accept, wait for the confirmation dialog with a
+        MutationObserver and click ok
+        
+        Args:
+            order_ids: (list) list of order ids
+            time_out: (float) max seconds to wait each confirmation dialog
+            
+        Returns:
+            int: number of orders accepted
+        """
+        
+        code = """
+            const selectors = arguments[0];
+            const orderIds = new Set(arguments[1]);
+            const timeOut = arguments[2];
+            const done = arguments[arguments.length - 1];
+            
+            const isVisible = (elem) => elem && elem.offsetParent !== null;
+            
+            // Resolve when the condition returns an element (or null after time out)
+            const waitFor = (condition) => new Promise(resolve => {
+                const found = condition();
+                if (found) {
+                    resolve(found);
+                    return;
+                }
+                const observer = new MutationObserver(() => {
+                    const elem = condition();
+                    if (elem) {
+                        observer.disconnect();
+                        clearTimeout(timer);
+                        resolve(elem);
+                    }
+                });
+                observer.observe(document.body, {
+                    childList: true, subtree: true, attributes: true
+                });
+                const timer = setTimeout(() => {
+                    observer.disconnect();
+                    resolve(null);
+                }, timeOut);
+            });
+            const visibleOk = () => {
+                const ok = document.querySelector(selectors.order_ok);
+                return isVisible(ok) ? ok : null;
+            };
+            const okClosed = () => visibleOk() ? null : document.body;
+            
+            (async () => {
+                const results = [];
+                const orders = document.querySelectorAll(selectors.orders);
+                for (const order of orders) {
+                    const idDate = order.querySelector(selectors.order_id);
+                    if (!idDate) {
+                        continue;
+                    }
+                    const parts = idDate.innerText.split(' - ');
+                    const id = parts[parts.length - 1].replace('#', '').trim();
+                    if (!orderIds.has(id)) {
+                        continue;
+                    }
+                    orderIds.delete(id);
+                    
+                    const start = performance.now();
+                    const accept = order.querySelector(selectors.order_accept);
+                    if (!accept) {
+                        results.push({id: id, status: 'no_accept_button'});
+                        continue;
+                    }
+                    accept.click();
+                    
+                    const ok = await waitFor(visibleOk);
+                    if (!ok) {
+                        results.push({id: id, status: 'no_confirmation'});
+                        continue;
+                    }
+                    ok.click();
+                    await waitFor(okClosed);
+                    
+                    const time = Math.round(performance.now() - start);
+                    results.push({id: id, status: 'accepted', time: time});
+                }
+                for (const id of orderIds) {
+                    results.push({id: id, status: 'not_found'});
+                }
+                done(results);
+            })().catch(error => done([{id: null, status: String(error)}]));
+        """
+        order_ids = list(order_ids)
+        script_time_out = (time_out * 2) * max(len(order_ids), 1) + 5
+        self.scraper.driver.set_script_timeout(script_time_out)
+        with latency.timer("factory.accept_js"):
+            results = self.scraper.driver.execute_async_script(
+                code, self.selectors, order_ids, int(time_out * 1000)
+            )
+        
+        orders_accepted = 0
+        for result in results:
+            if result["status"] == "accepted":
+                print(f"Order {result['id']} accepted in {result['time']} ms")
+                self.ledger.set_state(result["id"], OrderLedger.ACCEPTED)
+                orders_accepted += 1
+            else:
+                print(f"Order {result['id']} not accepted: {result['status']}")
+                
+                # Not listed yet orders keep pending
+                if result["status"] != "not_found" and result["id"]:
+                    self.ledger.set_state(result["id"], OrderLedger.FAILED)
+        
+        return orders_accepted
+
+    def loop_orders(self, order_ids: list) -> None:
+        """Loop through orders and stores it to be processed later.
+        
+        Args:
+            order_ids: (list) list of new order ids (pending orders of the
+                ledger are included too)
+        """
+        
+        print("\nLooping through orders...")
+        start = perf_counter()
+
+        selectors = self.selectors
+        
+        # Save new order ids, and accept all the pending ones (including
+        # the ones found in previous cycles)
+        for order_id in order_ids:
+            self.ledger.add_pending(order_id)
+        order_ids = self.ledger.get_pending()
+        if not order_ids:
+            print("No pending orders.")
+            return
+        
+        # Accept orders with http requests, and the rest with the browser
+        orders_accepted_api = 0
+        if self.api_client:
+            with latency.timer("factory.accept_api"):
+                accepted = self.api_client.accept_orders(order_ids)
+            orders_accepted_api = len(accepted)
+            for order_id in accepted:
+                self.ledger.set_state(order_id, OrderLedger.ACCEPTED)
+            order_ids = [order_id for order_id in order_ids if order_id not in accepted]
+            if not order_ids:
+                latency.record("factory.loop_orders", perf_counter() - start)
+                print(f"Total orders accepted: {orders_accepted_api}")
+                return
+
+        # Return to boostingfactory tab
+        if self.tab_handle:
+            self.scraper.switch_to_handle(self.tab_handle)
+
+        # Move to orders tab, and wait until the orders list is reloaded
+        # (the old list is still in the page while it loads)
+        with latency.timer("factory.wait_orders"):
+            self.scraper.wait_for_dom_change(
+                selectors["orders_list"],
+                time_out=2,
+                click_selectors=[selectors["orders_tab"], selectors["orders_tab"]],
+                settle_time=0.1,
+            )
+
+        if self.accept_mode == "js":
+            orders_accepted = self.__accept_orders_js__(order_ids)
+        else:
+            orders_accepted = self.__accept_orders_selenium__(order_ids)
+        
+        # Save page snapshot after accepting (in background), as failed
+        # only if an order failed in this pass (not listed ones keep pending)
+        if self.debug_capture:
+            failed = any(
+                self.ledger.get_state(order_id) == OrderLedger.FAILED
+                for order_id in order_ids
+            )
+            self.debug_capture.capture("orders", failed=failed)
+        orders_accepted += orders_accepted_api
+        latency.record("factory.loop_orders", perf_counter() - start)
 
         print(f"Total orders accepted: {orders_accepted}")
         
-    def validate_login(self):
-        """ Validate if user is logged in """
+    def reset_tabs(self):
+        """ Use the first tab of a new browser (after failover), and its
+        session in the api client
+        """
+        
+        self.tab_handle = self.scraper.driver.window_handles[0]
+        if self.api_client:
+            self.api_client.load_session(self.tab_handle)
+        
+    def validate_login(self, quit_on_error: bool = True):
+        """ Validate if user is logged in
+        
+        Args:
+            quit_on_error (bool, optional): end the bot if user is not
+                logged in (raise an exception if False). Defaults to True.
+        """
         
         print("Validating Boostingfactory login...")
                 
@@ -103,9 +375,16 @@ class FactoryScraper():
         current_url = self.scraper.driver.current_url
         if "/login" in current_url:
             print("Boostingfactory not logged in. Login again in Chrome.")
+            if not quit_on_error:
+                raise Exception("Boostingfactory not logged in")
             quit()
             
         print("Logged in Boostingfactory.")
+        self.tab_handle = self.scraper.driver.current_window_handle
+        
+        # Share browser session with the api client
+        if self.api_client:
+            self.api_client.load_session(self.tab_handle)
         sleep(5)
         self.scraper.refresh_selenium()
         
@@ -0,0 +1,201 @@
+from collections import deque
+
+
+class KeywordMatcher ():
+    """
+    Validate messages against all keywords in a single pass, with an
+    Aho-Corasick automaton over the keywords words.
+    A keyword matches when all its words are in the message.
+    """
+
+    def __init__(self, keywords: list, markers: list = []):
+        """ Compile keywords
+
+        Args:
+            keywords (list): list of keywords (lower case)
+            markers (list, optional): extra texts whose end positions are
+                reported by scan (like "order id:"). Defaults to [].
+        """
+
+        self.keywords = keywords
+        self.markers = markers
+
+        # Unique words and bitmask of the words required by each keyword
+        self.words = []
+        words_ids = {}
+        self.keywords_masks = []
+        for keyword in keywords:
+            mask = 0
+            for word in keyword.split(" "):
+
+                # Empty words are always in the message
+                if not word:
+                    continue
+
+                if word not in words_ids:
+                    words_ids[word] = len(self.words)
+                    self.words.append(word)
+                mask |= 1 << words_ids[word]
+            self.keywords_masks.append(mask)
+
+        # Keywords who use each word, to check only candidate keywords
+        self.words_keywords = [[] for _ in self.words]
+        for index, mask in enumerate(self.keywords_masks):
+            for word_id in self.__mask_ids__(mask):
+                self.words_keywords[word_id].append(index)
+
+        # Keywords without words always match
+        self.first_empty = None
+        for index, mask in enumerate(self.keywords_masks):
+            if not mask:
+                self.first_empty = index
+                break
+
+        self.__build_automaton__()
+
+    def __mask_ids__(self, mask: int):
+        """ Yield the ids of the bits set in a mask
+
+        Args:
+            mask (int): bitmask of words ids
+        """
+
+        while mask:
+            low_bit = mask & -mask
+            yield low_bit.bit_length() - 1
+            mask ^= low_bit
+
+    def __build_automaton__(self):
+        """ Build goto, fail and output tables """
+
+        # Trie of words
+        self.goto = [{}]
+        self.output = [0]
+        for word_id, word in enumerate(self.words):
+            state = 0
+            for char in word:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.output.append(0)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state] |= 1 << word_id
+
+        # Markers (reported with their positions)
+        self.markers_output = [()] * len(self.goto)
+        for marker_id, marker in enumerate(self.markers):
+            state = 0
+            for char in marker:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.output.append(0)
+                    self.markers_output.append(())
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.markers_output[state] += (marker_id,)
+
+        # Fail links (breadth first), merging outputs of suffixes
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(char, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+                self.markers_output[next_state] += self.markers_output[self.fail[next_state]]
+
+    def words_found(self, message: str) -> int:
+        """ Scan the message once and return the words found
+
+        Args:
+            message (str): message text
+
+        Returns:
+            int: bitmask of the words ids found in the message
+        """
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+
+        found = 0
+        state = 0
+        for char in message:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found |= output[state]
+
+        return found
+
+    def scan(self, message: str) -> tuple[int, list]:
+        """ Scan the message once and return the words and markers found
+
+        Args:
+            message (str): message text
+
+        Returns:
+            tuple[int, list]: bitmask of the words ids found, and
+                (marker id, marker end position) of each marker found
+        """
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        markers_output = self.markers_output
+
+        found = 0
+        markers_found = []
+        state = 0
+        for position, char in enumerate(message):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found |= output[state]
+            for marker_id in markers_output[state]:
+                markers_found.append((marker_id, position + 1))
+
+        return found, markers_found
+
+    def match(self, message: str) -> str:
+        """ Return the first keyword (in keywords order) with all its words
+        in the message
+
+        Args:
+            message (str): message text
+
+        Returns:
+            str: keyword found, or None
+        """
+
+        return self.match_found(self.words_found(message))
+
+    def match_found(self, found: int) -> str:
+        """ Return the first keyword (in keywords order) with all its words
+        in the words found
+
+        Args:
+            found (int): bitmask of the words ids found in a message
+
+        Returns:
+            str: keyword found, or None
+        """
+
+        # Check only keywords who use the words found
+        first_index = self.first_empty
+        for word_id in self.__mask_ids__(found):
+            for index in self.words_keywords[word_id]:
+                if first_index is not None and index >= first_index:
+                    break
+                mask = self.keywords_masks[index]
+                if mask & found == mask:
+                    first_index = index
+                    break
+
+        if first_index is None:
+            return None
+        return self.keywords[first_index]
@@ -0,0 +1,160 @@
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep, time
+
+
+class LatencyTracker ():
+    """
+    Per stage latency histograms (last samples of each stage), with
+    p50 / p95 / p99, exported to a jsonl file and as prometheus text
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, max_samples: int = 5000):
+        """ Create empty tracker
+
+        Args:
+            max_samples (int, optional): samples kept by stage. Defaults to 5000.
+        """
+
+        self.max_samples = max_samples
+
+        # Stage -> last samples (seconds), total count and sum
+        self.samples = {}
+        self.counts = {}
+        self.sums = {}
+
+        self.lock = threading.Lock()
+        self.server = None
+
+    @contextmanager
+    def timer(self, stage: str):
+        """ Time the code inside the with block
+
+        Args:
+            stage (str): stage name
+        """
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        """ Save a stage duration
+
+        Args:
+            stage (str): stage name
+            seconds (float): duration
+        """
+
+        with self.lock:
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.max_samples)
+                self.counts[stage] = 0
+                self.sums[stage] = 0.0
+            self.samples[stage].append(seconds)
+            self.counts[stage] += 1
+            self.sums[stage] += seconds
+
+    def get_stats(self) -> dict:
+        """ Return the percentiles of each stage
+
+        Returns:
+            dict: stage -> count, sum, p50, p95 and p99 (seconds)
+        """
+
+        with self.lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+            counts = dict(self.counts)
+            sums = dict(self.sums)
+
+        stats = {}
+        for stage, values in samples.items():
+            stats[stage] = {"count": counts[stage], "sum": sums[stage]}
+            for quantile in LatencyTracker.QUANTILES:
+                index = min(int(quantile * len(values)), len(values) - 1)
+                stats[stage][f"p{int(quantile * 100)}"] = values[index]
+
+        return stats
+
+    def export_jsonl(self, path: str):
+        """ Append current stats to a jsonl file
+
+        Args:
+            path (str): jsonl file path
+        """
+
+        line = {"timestamp": time(), "stages": self.get_stats()}
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(line) + "\n")
+
+    def get_prometheus_text(self) -> str:
+        """ Return stats in prometheus text format
+
+        Returns:
+            str: prometheus summary metrics
+        """
+
+        metric = "bot_stage_latency_seconds"
+        lines = [
+            f"# HELP {metric} Duration of each bot stage.",
+            f"# TYPE {metric} summary",
+        ]
+        for stage, stats in sorted(self.get_stats().items()):
+            for quantile in LatencyTracker.QUANTILES:
+                value = stats[f"p{int(quantile * 100)}"]
+                lines.append(f'{metric}{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {stats["count"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def start(self, jsonl_path: str = "", port: int = 0, export_interval: float = 60):
+        """ Export stats in background: to the jsonl file every export
+        interval, and in a http endpoint (/metrics)
+
+        Args:
+            jsonl_path (str, optional): jsonl file ("" to disable). Defaults to "".
+            port (int, optional): http port (0 to disable). Defaults to 0.
+            export_interval (float, optional): seconds between jsonl exports. Defaults to 60.
+        """
+
+        if jsonl_path:
+            def export_loop():
+                while True:
+                    sleep(export_interval)
+                    self.export_jsonl(jsonl_path)
+
+            threading.Thread(target=export_loop, daemon=True).start()
+
+        if port:
+            tracker = self
+
+            class MetricsHandler (BaseHTTPRequestHandler):
+
+                def log_message(self, format, *args):
+                    pass
+
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = tracker.get_prometheus_text().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+# Tracker shared by all the bot modules
+latency = LatencyTracker()
@@ -0,0 +1,116 @@
+from time import time
+
+from rich import print
+
+from libs.web_scraping import WebScraping
+
+
+class MemoryGovernor ():
+    """
+    Keep the memory of long running tabs bounded: sample the js heap
+    (performance.memory) and the dom nodes (CDP Memory.getDOMCounters),
+    prune the old items of a list when the limits are crossed, and ask
+    for a reload only if the tab is still over the limits after it.
+    """
+
+    def __init__(self, scraper: WebScraping, list_selector: str,
+                 max_heap_mb: float = 300, max_nodes: int = 30000,
+                 keep_items: int = 50, check_interval: float = 30) -> None:
+        """ Save limits
+
+        Args:
+            scraper (WebScraping): scraper instance
+            list_selector (str): css selector of the list to prune
+            max_heap_mb (float, optional): max used js heap. Defaults to 300.
+            max_nodes (int, optional): max dom nodes. Defaults to 30000.
+            keep_items (int, optional): last list items to keep when pruning. Defaults to 50.
+            check_interval (float, optional): seconds between checks of each tab. Defaults to 30.
+        """
+
+        self.scraper = scraper
+        self.list_selector = list_selector
+        self.max_heap_mb = max_heap_mb
+        self.max_nodes = max_nodes
+        self.keep_items = keep_items
+        self.check_interval = check_interval
+
+        # Tab handle -> last check time
+        self.last_checks = {}
+
+        # Last memory sample of each tab
+        self.samples = {}
+
+    def __sample__(self) -> dict:
+        """ Read memory usage of the current tab
+
+        Returns:
+            dict: heap_mb and nodes
+        """
+
+        heap = self.scraper.driver.execute_script(
+            "return performance.memory ? performance.memory.usedJSHeapSize : 0"
+        )
+        counters = self.scraper.driver.execute_cdp_cmd("Memory.getDOMCounters", {})
+
+        return {
+            "heap_mb": heap / (1024 * 1024),
+            "nodes": counters.get("nodes", 0),
+        }
+
+    def __over_limits__(self, sample: dict) -> bool:
+        """ Check if a memory sample crosses the limits
+
+        Args:
+            sample (dict): memory sample
+
+        Returns:
+            bool: True if heap or nodes are over the limits
+        """
+
+        return sample["heap_mb"] > self.max_heap_mb or sample["nodes"] > self.max_nodes
+
+    def check(self, handle: str) -> bool:
+        """ Check the memory of a tab (every check interval), pruning the
+        old list items if it's over the limits
+
+        Args:
+            handle (str): tab handle
+
+        Returns:
+            bool: True if the tab must be reloaded
+        """
+
+        now = time()
+        if now - self.last_checks.get(handle, 0) < self.check_interval:
+            return False
+        self.last_checks[handle] = now
+
+        try:
+            self.scraper.switch_to_handle(handle)
+            sample = self.__sample__()
+        except Exception as e:
+            self.scraper.logger.error(f"Failed to read tab memory: {e}")
+            return False
+        self.samples[handle] = sample
+
+        if not self.__over_limits__(sample):
+            return False
+
+        # Remove old items and check again
+        print(f"Tab memory over limits ({sample['heap_mb']:.0f} MB, "
+              f"{sample['nodes']} nodes). Pruning old items...")
+        selector = f"{self.list_selector} > li:nth-last-child(n+{self.keep_items + 1})"
+        self.scraper.remove_elems(selector)
+        try:
+            self.scraper.driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+            sample = self.__sample__()
+        except Exception:
+            return True
+        self.samples[handle] = sample
+
+        if self.__over_limits__(sample):
+            print("Tab memory still over limits. Reloading tab...")
+            del self.last_checks[handle]
+            return True
+
+        return False
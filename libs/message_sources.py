@@ -0,0 +1,249 @@
+import re
+import json
+import zlib
+import base64
+from time import sleep, time
+
+from rich import print
+
+from libs.web_scraping import WebScraping
+
+
+class MessageSource ():
+    """
+    Base class of the sources of new Discord messages used by
+    DiscordChatReader
+    """
+
+    def start(self):
+        """ Prepare the source before reading messages """
+
+    def read_messages(self, wait_time: float = 0) -> list[str]:
+        """ Return new messages, as soon as there are some or after wait time
+
+        Args:
+            wait_time (float, optional): max seconds to wait. Defaults to 0.
+
+        Returns:
+            list[str]: new messages text
+        """
+
+        raise NotImplementedError
+
+
+def load_frame_log(path: str):
+    """ Create a log reader who returns the performance log entries saved
+    in a jsonl file (recorded with GatewayMessageSource record_path), to
+    replay them offline
+
+    Args:
+        path (str): jsonl file with one performance log entry per line
+
+    Returns:
+        function: log reader (all entries in first call, then empty lists)
+    """
+
+    with open(path, "r", encoding="utf-8") as file:
+        entries = [json.loads(line) for line in file if line.strip()]
+
+    def read_log() -> list[dict]:
+        nonlocal entries
+        read_entries, entries = entries, []
+        return read_entries
+
+    return read_log
+
+
+class GatewayMessageSource (MessageSource):
+    """
+    Read MESSAGE_CREATE events from the Discord gateway websocket frames
+    of the page, using chrome performance logs (CDP
+    Network.webSocketFrameReceived events), before React renders them.
+    Requires WebScraping with performance_log=True.
+    """
+
+    def __init__(self, scraper: WebScraping = None, server_link: str = "",
+                 channels_names: list = [], log_reader=None, record_path: str = ""):
+        """ Create source
+
+        Args:
+            scraper (WebScraping, optional): scraper instance. Defaults to None.
+            server_link (str, optional): discord server link, to keep only
+                its messages. Defaults to "".
+            channels_names (list, optional): channels to keep (all channels
+                if their names are unknown). Defaults to [].
+            log_reader (function, optional): function who returns new
+                performance log entries. Defaults to the browser logs.
+            record_path (str, optional): jsonl file to save the entries read,
+                to replay them later with load_frame_log. Defaults to "".
+        """
+
+        self.scraper = scraper
+        self.guild_id = server_link.rstrip("/").split("/")[-1] if server_link else ""
+        self.channels_names = channels_names
+        self.log_reader = log_reader
+        self.record_path = record_path
+
+        # Gateway sockets by request id: zlib inflator (None if not compressed)
+        self.sockets = {}
+        self.buffers = {}
+
+        # Channels names learned from gateway events
+        self.channels_ids = set()
+
+        self.messages = []
+
+    def __read_log__(self) -> list[dict]:
+        """ Read new performance log entries
+
+        Returns:
+            list[dict]: log entries
+        """
+
+        if self.log_reader:
+            entries = self.log_reader()
+        else:
+            entries = self.scraper.driver.get_log("performance")
+
+        if self.record_path and entries:
+            with open(self.record_path, "a", encoding="utf-8") as file:
+                for entry in entries:
+                    file.write(json.dumps(entry) + "\n")
+
+        return entries
+
+    def __process_entry__(self, entry: dict):
+        """ Process websocket events of a performance log entry
+
+        Args:
+            entry (dict): performance log entry
+        """
+
+        message = entry["message"]
+        if isinstance(message, str):
+            message = json.loads(message)
+        message = message.get("message", message)
+        method = message.get("method", "")
+        params = message.get("params", {})
+
+        # New gateway connection
+        if method == "Network.webSocketCreated":
+            url = params.get("url", "")
+            if "gateway" not in url:
+                return
+            if "compress=zlib-stream" in url:
+                self.sockets[params["requestId"]] = zlib.decompressobj()
+            elif "compress=" in url:
+                print(f"\tUnsupported gateway compression: {url}")
+                return
+            else:
+                self.sockets[params["requestId"]] = None
+            self.buffers[params["requestId"]] = b""
+            return
+
+        if method != "Network.webSocketFrameReceived":
+            return
+
+        request_id = params.get("requestId")
+        if request_id not in self.sockets:
+            return
+
+        response = params["response"]
+        inflator = self.sockets[request_id]
+
+        # Text frame
+        if response["opcode"] == 1 and inflator is None:
+            data = response["payloadData"]
+
+        # Binary frame (zlib stream, complete messages end with Z_SYNC_FLUSH)
+        else:
+            payload = base64.b64decode(response["payloadData"])
+            if inflator is None:
+                data = payload.decode("utf-8")
+            else:
+                self.buffers[request_id] += payload
+                if not self.buffers[request_id].endswith(b"\x00\x00\xff\xff"):
+                    return
+                data = inflator.decompress(self.buffers[request_id]).decode("utf-8")
+                self.buffers[request_id] = b""
+
+        self.__process_event__(json.loads(data))
+
+    def __process_event__(self, event: dict):
+        """ Save the channels ids and the new messages of a gateway event
+
+        Args:
+            event (dict): gateway event
+        """
+
+        event_type = event.get("t")
+        data = event.get("d") or {}
+
+        # Learn channels ids from their names
+        if event_type in ("READY", "GUILD_CREATE"):
+            guilds = data.get("guilds", []) if event_type == "READY" else [data]
+            for guild in guilds:
+                if self.guild_id and guild.get("id") != self.guild_id:
+                    continue
+                for channel in guild.get("channels", []):
+                    if channel.get("name") in self.channels_names:
+                        self.channels_ids.add(channel["id"])
+            return
+
+        if event_type != "MESSAGE_CREATE":
+            return
+
+        if self.guild_id and data.get("guild_id") != self.guild_id:
+            return
+        if self.channels_ids and data.get("channel_id") not in self.channels_ids:
+            return
+
+        self.messages.append(self.__get_message_text__(data))
+
+    def __get_message_text__(self, data: dict) -> str:
+        """ Message text like it's rendered in the page (without markdown)
+
+        Args:
+            data (dict): MESSAGE_CREATE data
+
+        Returns:
+            str: message text
+        """
+
+        texts = [data.get("content", "")]
+        for embed in data.get("embeds", []):
+            texts.append(embed.get("title", ""))
+            texts.append(embed.get("description", ""))
+            for field in embed.get("fields", []):
+                texts.append(f"{field.get('name', '')} {field.get('value', '')}")
+
+        text = " ".join(filter(None, texts))
+        text = re.sub(r"\*|~~|`|\|\||__", "", text)
+
+        if data.get("mention_everyone") and "@everyone" not in text:
+            text = f"@everyone {text}"
+
+        return text
+
+    def read_messages(self, wait_time: float = 0) -> list[str]:
+        """ Return new messages of the gateway frames, as soon as there are
+        some or after wait time
+
+        Args:
+            wait_time (float, optional): max seconds to wait. Defaults to 0.
+
+        Returns:
+            list[str]: new messages text
+        """
+
+        end_time = time() + wait_time
+        while True:
+            for entry in self.__read_log__():
+                self.__process_entry__(entry)
+
+            if self.messages or time() >= end_time:
+                break
+            sleep(0.02)
+
+        messages, self.messages = self.messages, []
+        return messages
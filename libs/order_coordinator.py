@@ -0,0 +1,87 @@
+import zlib
+
+from rich import print
+
+from libs.claim_store import ClaimStore
+from libs.discord_chat_reader import DiscordChatReader
+from libs.factory_scraper import FactoryScraper
+
+
+class OrderCoordinator ():
+    """
+    Split the bot in many instances: one detector reads Discord and
+    publishes the order ids in the claim store, and each worker (with its
+    own browser and Boostingfactory account) accepts the orders of its
+    shard, claiming them first so no two workers race on the same order.
+    """
+
+    def __init__(self, claim_store: ClaimStore, worker_id: str,
+                 shard_index: int = 0, shards_count: int = 1,
+                 claim_ttl: float = 600) -> None:
+        """ Save settings
+
+        Args:
+            claim_store (ClaimStore): store shared by all the instances
+            worker_id (str): unique id of this instance
+            shard_index (int, optional): shard of this worker. Defaults to 0.
+            shards_count (int, optional): number of shards (1 to let all the
+                workers claim all the orders). Defaults to 1.
+            claim_ttl (float, optional): seconds to keep each claim. Defaults to 600.
+        """
+
+        self.claim_store = claim_store
+        self.worker_id = worker_id
+        self.shard_index = shard_index
+        self.shards_count = shards_count
+        self.claim_ttl = claim_ttl
+
+    def is_own_shard(self, order_id: str) -> bool:
+        """ Check if the order belongs to the shard of this worker
+
+        Args:
+            order_id (str): order id
+
+        Returns:
+            bool: True if the worker must try to accept the order
+        """
+
+        if self.shards_count <= 1:
+            return True
+        return zlib.crc32(order_id.encode()) % self.shards_count == self.shard_index
+
+    def run_detector(self, discord_chat_reader: DiscordChatReader):
+        """ Publish the new order ids found in Discord, forever
+
+        Args:
+            discord_chat_reader (DiscordChatReader): logged in discord reader
+        """
+
+        print(f"\nDetector {self.worker_id} running...")
+        while True:
+            discord_chat_reader.wait_for_messages()
+            self.claim_store.publish(discord_chat_reader.order_ids)
+            print(f"Published {len(discord_chat_reader.order_ids)} order ids.")
+
+    def run_worker(self, factory_scraper: FactoryScraper, wait_time: float = 1):
+        """ Claim and accept the published order ids, forever
+
+        Args:
+            factory_scraper (FactoryScraper): logged in boostingfactory scraper
+            wait_time (float, optional): max seconds to wait each read. Defaults to 1.
+        """
+
+        print(f"\nWorker {self.worker_id} running "
+              f"(shard {self.shard_index + 1}/{self.shards_count})...")
+
+        # Only orders published from now
+        last_id = self.claim_store.get_last_id()
+        while True:
+            order_ids, last_id = self.claim_store.read_order_ids(last_id, wait_time)
+            claimed = [
+                order_id for order_id in order_ids
+                if self.is_own_shard(order_id)
+                and self.claim_store.claim(order_id, self.worker_id, self.claim_ttl)
+            ]
+            if claimed:
+                print(f"Claimed orders: {', '.join(claimed)}")
+                factory_scraper.loop_orders(claimed)
@@ -0,0 +1,184 @@
+import heapq
+import threading
+from time import time
+
+from libs.latency_tracker import latency
+
+
+class OrderLedger ():
+    """
+    Persistent state of each order id, shared by DiscordChatReader and
+    FactoryScraper, with O(1) lookups and automatic expiration.
+
+    States:
+        seen: listed in Boostingfactory but not found in Discord
+        pending: found in Discord, waiting to be accepted
+        accepted: already accepted (never retried)
+        failed: accept failed
+        expired: pending for too long
+    """
+
+    SEEN = "seen"
+    PENDING = "pending"
+    ACCEPTED = "accepted"
+    FAILED = "failed"
+    EXPIRED = "expired"
+
+    # Seconds to keep each state
+    TTLS = {
+        SEEN: 600,
+        PENDING: 600,
+        ACCEPTED: 86400,
+        FAILED: 300,
+        EXPIRED: 600,
+    }
+
+    def __init__(self, ttls: dict = {}):
+        """ Create empty ledger
+
+        Args:
+            ttls (dict, optional): seconds to keep each state, to replace
+                the default ones. Defaults to {}.
+        """
+
+        self.ttls = {**OrderLedger.TTLS, **ttls}
+
+        # Order id -> (state, expiration time)
+        self.orders = {}
+
+        # (expiration time, order id), to expire orders without full scans
+        self.expirations = []
+
+        # Order id -> time when it was found, to time found to accepted
+        self.pending_times = {}
+
+        self.lock = threading.Lock()
+
+    def __save__(self, order_id: str, state: str, now: float):
+        """ Save order state (lock must be acquired)
+
+        Args:
+            order_id (str): order id
+            state (str): new state
+            now (float): current timestamp
+        """
+
+        # Time from found to accepted
+        if state == OrderLedger.PENDING:
+            self.pending_times[order_id] = now
+        elif order_id in self.pending_times:
+            pending_time = self.pending_times.pop(order_id)
+            if state == OrderLedger.ACCEPTED:
+                latency.record("order.found_to_accepted", now - pending_time)
+
+        expires_at = now + self.ttls[state]
+        self.orders[order_id] = (state, expires_at)
+        heapq.heappush(self.expirations, (expires_at, order_id))
+
+    def __expire__(self, now: float):
+        """ Expire old orders (lock must be acquired): pending orders
+        change to expired, and the rest are removed
+
+        Args:
+            now (float): current timestamp
+        """
+
+        while self.expirations and self.expirations[0][0] <= now:
+            expires_at, order_id = heapq.heappop(self.expirations)
+
+            # Skip outdated expirations (order state changed after it)
+            order = self.orders.get(order_id)
+            if not order or order[1] != expires_at:
+                continue
+
+            if order[0] == OrderLedger.PENDING:
+                self.__save__(order_id, OrderLedger.EXPIRED, now)
+            else:
+                del self.orders[order_id]
+
+    def get_state(self, order_id: str) -> str:
+        """ Return order state
+
+        Args:
+            order_id (str): order id
+
+        Returns:
+            str: order state, or None if the order is unknown
+        """
+
+        with self.lock:
+            self.__expire__(time())
+            order = self.orders.get(order_id)
+            return order[0] if order else None
+
+    def set_state(self, order_id: str, state: str):
+        """ Update order state
+
+        Args:
+            order_id (str): order id
+            state (str): new state
+        """
+
+        with self.lock:
+            now = time()
+            self.__expire__(now)
+            self.__save__(order_id, state, now)
+
+    def add_pending(self, order_id: str) -> bool:
+        """ Save a new order id found in Discord (accepted and pending
+        orders are not added again)
+
+        Args:
+            order_id (str): order id
+
+        Returns:
+            bool: True if the order is new pending order
+        """
+
+        with self.lock:
+            now = time()
+            self.__expire__(now)
+            order = self.orders.get(order_id)
+            if order and order[0] in (OrderLedger.PENDING, OrderLedger.ACCEPTED):
+                return False
+            self.__save__(order_id, OrderLedger.PENDING, now)
+            return True
+
+    def add_seen(self, order_id: str):
+        """ Save an order listed in Boostingfactory, if it's unknown
+
+        Args:
+            order_id (str): order id
+        """
+
+        with self.lock:
+            now = time()
+            self.__expire__(now)
+            if order_id not in self.orders:
+                self.__save__(order_id, OrderLedger.SEEN, now)
+
+    def is_pending(self, order_id: str) -> bool:
+        """ Check if the order is waiting to be accepted
+
+        Args:
+            order_id (str): order id
+
+        Returns:
+            bool: True if the order is pending
+        """
+
+        return self.get_state(order_id) == OrderLedger.PENDING
+
+    def get_pending(self) -> list:
+        """ Return the orders waiting to be accepted
+
+        Returns:
+            list: pending order ids
+        """
+
+        with self.lock:
+            self.__expire__(time())
+            return [
+                order_id for order_id, order in self.orders.items()
+                if order[0] == OrderLedger.PENDING
+            ]
@@ -0,0 +1,90 @@
+import re
+
+from libs.keyword_matcher import KeywordMatcher
+
+# Value of each field, read right after its label
+ORDER_ID_REGEX = re.compile(r"\s*#?([^\s,;]+)")
+PRICE_REGEX = re.compile(r"\s*\$?\s*(\d[\d.,]*)")
+
+# Text value, until the next field label (regex built with the labels of each parser)
+TEXT_REGEX = None
+
+FIELDS_REGEX = {
+    "order id:": ("order_ids", ORDER_ID_REGEX),
+    "game:": ("game", TEXT_REGEX),
+    "price:": ("price", PRICE_REGEX),
+    "platform:": ("platform", TEXT_REGEX),
+    "region:": ("region", TEXT_REGEX),
+    "service:": ("service", TEXT_REGEX),
+}
+
+
+class OrderMessageParser ():
+    """
+    Validate keywords and extract the order data of a message, scanning it
+    once: the keywords matcher also finds the position of each field label,
+    and compiled regex read the values right after them.
+    """
+
+    def __init__(self, keywords: list, fields_regex: dict = FIELDS_REGEX):
+        """ Compile keywords and fields labels
+
+        Args:
+            keywords (list): list of keywords (lower case)
+            fields_regex (dict, optional): field label -> (field name, value regex,
+                or TEXT_REGEX for text values). Defaults to FIELDS_REGEX.
+        """
+
+        self.fields_regex = fields_regex
+        self.labels = list(fields_regex.keys())
+        self.matcher = KeywordMatcher(keywords, markers=self.labels)
+        self.text_regex = get_text_regex(self.labels)
+
+    def parse(self, message: str) -> dict:
+        """ Validate message and extract its order data
+
+        Args:
+            message (str): message text (lower case)
+
+        Returns:
+            dict: keyword found (None if there isn't), all the order ids
+                and the first value of each other field found
+        """
+
+        found, labels_found = self.matcher.scan(message)
+
+        order = {
+            "keyword": self.matcher.match_found(found),
+            "order_ids": [],
+        }
+        if order["keyword"] is None:
+            return order
+
+        for label_id, position in labels_found:
+            field, regex = self.fields_regex[self.labels[label_id]]
+            value = (regex or self.text_regex).match(message, position)
+            if not value:
+                continue
+
+            if field == "order_ids":
+                if value.group(1) not in order["order_ids"]:
+                    order["order_ids"].append(value.group(1))
+            elif field not in order:
+                order[field] = value.group(1)
+
+        return order
+
+
+def get_text_regex(labels: list) -> re.Pattern:
+    """ Compile the regex of text values: the value ends in the next
+    field label (so multi word values are kept), or in the message end
+
+    Args:
+        labels (list): fields labels
+
+    Returns:
+        re.Pattern: text value regex
+    """
+
+    labels_regex = "|".join(map(re.escape, labels))
+    return re.compile(rf"\s*(.+?)(?=[\s,;|]+(?:{labels_regex})|\s*$)")
@@ -0,0 +1,122 @@
+import threading
+from queue import Queue, Empty
+from time import sleep
+
+from rich import print
+
+from libs.discord_chat_reader import DiscordChatReader
+from libs.factory_scraper import FactoryScraper
+
+
+class OrderPipeline ():
+    """
+    Detect and accept orders at the same time: a watcher thread pushes the
+    order ids found in Discord to a queue, while an acceptor thread consumes
+    them in Boostingfactory.
+    Both threads share the same browser, so each webdriver call is protected
+    with a lock. Discord tabs stay open and their observers keep buffering
+    messages while orders are being accepted.
+    """
+
+    def __init__(self, discord_chat_reader: DiscordChatReader,
+                 factory_scraper: FactoryScraper, poll_time: float = 0.05,
+                 batch_wait: float = 0.05) -> None:
+        """ Create pipeline
+
+        Args:
+            discord_chat_reader (DiscordChatReader): order ids producer
+            factory_scraper (FactoryScraper): order ids consumer
+            poll_time (float, optional): seconds between Discord reads. Defaults to 0.05.
+            batch_wait (float, optional): seconds to wait for more order ids
+                before accepting a batch. Defaults to 0.05.
+        """
+
+        self.discord_chat_reader = discord_chat_reader
+        self.factory_scraper = factory_scraper
+        self.poll_time = poll_time
+        self.batch_wait = batch_wait
+
+        self.queue = Queue()
+        self.lock = threading.Lock()
+        self.running = False
+        self.error = None
+
+    def __watch__(self):
+        """ Producer: read new order ids from Discord and queue them """
+
+        try:
+            with self.lock:
+                self.discord_chat_reader.start_watching()
+
+            while self.running:
+                with self.lock:
+                    order_ids = self.discord_chat_reader.collect_order_ids()
+                for order_id in order_ids:
+                    self.queue.put(order_id)
+                sleep(self.poll_time)
+        except Exception as error:
+            self.error = error
+            self.running = False
+
+    def __get_batch__(self) -> list:
+        """ Wait for the next order id, and the ones who arrive right after it
+
+        Returns:
+            list: order ids (empty if the pipeline stopped)
+        """
+
+        order_ids = []
+        while self.running and not order_ids:
+            try:
+                order_ids.append(self.queue.get(timeout=0.5))
+            except Empty:
+                continue
+
+        sleep(self.batch_wait)
+        while True:
+            try:
+                order_id = self.queue.get_nowait()
+            except Empty:
+                break
+            if order_id not in order_ids:
+                order_ids.append(order_id)
+
+        return order_ids
+
+    def __accept__(self):
+        """ Consumer: accept queued order ids in Boostingfactory """
+
+        try:
+            while self.running:
+                order_ids = self.__get_batch__()
+                if not order_ids:
+                    continue
+
+                with self.lock:
+                    self.factory_scraper.loop_orders(order_ids)
+        except Exception as error:
+            self.error = error
+            self.running = False
+
+    def run(self):
+        """ Start watcher and acceptor threads and wait for them """
+
+        print("\nStarting orders pipeline...")
+
+        self.running = True
+        threads = [
+            threading.Thread(target=self.__watch__, name="watcher", daemon=True),
+            threading.Thread(target=self.__accept__, name="acceptor", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.running = False
+
+        if self.error:
+            raise self.error
@@ -0,0 +1,107 @@
+import hashlib
+from collections import OrderedDict
+from time import time
+
+
+class SeenIndex ():
+    """
+    Bounded LRU index of already seen messages, keyed by a message hash.
+    Membership checks are O(1) and memory is capped by max_size (and
+    optionally by a time window).
+    """
+
+    def __init__(self, max_size: int = 5000, ttl: float = 0):
+        """ Create empty index
+
+        Args:
+            max_size (int, optional): max number of messages saved. Defaults to 5000.
+            ttl (float, optional): seconds to remember each message
+                (0 to remember until evicted by size). Defaults to 0.
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # Message hash -> last time seen (least recently seen first)
+        self.items = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def __key__(self, message: str) -> bytes:
+        """ Short and fixed size key of the message
+
+        Args:
+            message (str): message text or message id
+
+        Returns:
+            bytes: message hash
+        """
+
+        return hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
+
+    def __expire__(self, now: float):
+        """ Remove the messages older than the time window
+
+        Args:
+            now (float): current timestamp
+        """
+
+        if not self.ttl:
+            return
+
+        while self.items:
+            key, seen_time = next(iter(self.items.items()))
+            if now - seen_time < self.ttl:
+                break
+            del self.items[key]
+
+    def check_and_add(self, message: str) -> bool:
+        """ Check if message was already seen, and save it
+
+        Args:
+            message (str): message text or message id
+
+        Returns:
+            bool: True if the message was already seen
+        """
+
+        now = time()
+        self.__expire__(now)
+
+        key = self.__key__(message)
+        seen = key in self.items
+        if seen:
+            self.hits += 1
+            self.items.move_to_end(key)
+        else:
+            self.misses += 1
+
+        self.items[key] = now
+
+        # Remove least recently seen messages
+        while len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+        return seen
+
+    def __contains__(self, message: str) -> bool:
+        self.__expire__(time())
+        return self.__key__(message) in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get_stats(self) -> dict:
+        """ Return index counters
+
+        Returns:
+            dict: size, hits and misses
+        """
+
+        return {
+            "size": len(self.items),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
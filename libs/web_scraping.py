@@ -1,9 +1,13 @@
 import json
 import logging
 import os
+import socket
 import time
 import zipfile
+from fnmatch import fnmatchcase
+from urllib.parse import urlparse
 
+import websocket
 from selenium import webdriver
 from selenium.common.exceptions import (NoSuchElementException,
                                         NoSuchFrameException, TimeoutException)
@@ -13,6 +17,10 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select, WebDriverWait
 
+from libs.latency_tracker import latency
+from libs.cdp_channel import CdpChannel
+from libs.browser_launch_config import BrowserLaunchConfig
+
 current_file = os.path.basename(__file__)
 
 
@@ -21,15 +29,18 @@ class WebScraping ():
     Class to manage and configure web browser
     """
 
-    service = None
-    options = None
+    # Driver found by selenium in the first launch
+    driver_path = None
 
     def __init__(self, headless=False, time_out=0,
                  proxy_server="", proxy_port="", proxy_user="", proxy_pass="",
                  chrome_folder="", user_agent=False,
                  download_folder="", extensions=[], incognito=False, experimentals=True,
                  start_killing=False, start_openning: bool = True, width: int = 1280,
-                 height: int = 720, mute: bool = True):
+                 height: int = 720, mute: bool = True, performance_log: bool = False,
+                 fast_start: bool = False, driver_path: str = "", debugger_address: str = "",
+                 block_rules: dict = {}, cdp_scripts: bool = False,
+                 kill_all_chrome: bool = False):
         """ Constructor of the class
 
         Args:
@@ -45,11 +56,31 @@ class WebScraping ():
             extensions (list, optional): Paths of extensions in format .crx, to install. Defaults to [].
             incognito (bool, optional): Open chrome in incognito mode. Defaults to False.
             experimentals (bool, optional): Activate the experimentals options. Defaults to True.
-            start_killing (bool, optional): Kill chrome process before start. Defaults to False.
+            start_killing (bool, optional): Kill chrome process before start (only the
+                processes of chrome_folder profile, if it's set). Defaults to False.
             start_openning (bool, optional): Open chrome window before start. Defaults to True.
             width (int, optional): Width of the window. Defaults to 1280.
             height (int, optional): Height of the window. Defaults to 720.
             mute (bool, optional): Mute the audio of the window. Defaults to True.
+            performance_log (bool, optional): Save chrome performance logs (CDP network
+                events, like websocket frames). Defaults to False.
+            fast_start (bool, optional): Cache the chromedriver path found by selenium,
+                to skip the driver resolution in the next starts. Defaults to False.
+            driver_path (str, optional): Chromedriver path to use. Defaults to "".
+            debugger_address (str, optional): Host and port (like "127.0.0.1:9222") to
+                reattach to a running chrome, or to open it with remote debugging
+                (to reattach it in the next starts). Defaults to "".
+            block_rules (dict, optional): Requests to block by site (domain, or "*" for
+                all the sites), like {"discord.com": {"block": ["*.png"], "allow": []}},
+                with url patterns of CDP Network.setBlockedURLs (CDP can only block, so
+                block patterns inside an "allow" pattern are not used, and "allow"
+                patterns narrower than a block pattern are warned and stay blocked).
+                Defaults to {}.
+            cdp_scripts (bool, optional): Run the hot path scripts (run_script) through
+                the devtools websocket of each tab, instead of chromedriver. Defaults to False.
+            kill_all_chrome (bool, optional): Kill all the chrome processes at start (like
+                the chrome opened by the user with the same profile), and not only the
+                ones of chrome_folder. Restarts only kill the chrome_folder ones. Defaults to False.
         """
         # Initialize logger
         self.logger = logging.getLogger(__name__)
@@ -80,19 +111,51 @@ class WebScraping ():
         self.__width__ = width
         self.__height__ = height
         self.__mute__ = mute
+        self.__performance_log__ = performance_log
+        self.__fast_start__ = fast_start
+        self.__driver_path__ = driver_path
+        self.__debugger_address__ = debugger_address
+        self.__driver_cache__ = os.path.join(self.current_folder, ".chromedriver_path")
+        self.__block_rules__ = block_rules
+        self.__cdp_scripts__ = cdp_scripts
+        self.__check_block_rules__()
+
+        # Devtools websocket of each tab, and current tab (updated in switches)
+        self.cdp_channels = {}
+        self.current_handle = None
 
         self.__web_page__ = None
 
+        # Launch settings (new options are built from them in each launch)
+        has_proxy_auth = proxy_server and proxy_port and proxy_user and proxy_pass
+        self.launch_config = BrowserLaunchConfig(
+            headless=headless,
+            chrome_folder=chrome_folder,
+            user_agent=user_agent,
+            download_folder=download_folder,
+            extensions=tuple(extensions),
+            incognito=incognito,
+            experimentals=experimentals,
+            width=width,
+            height=height,
+            mute=mute,
+            performance_log=performance_log,
+            proxy_server=proxy_server,
+            proxy_port=proxy_port,
+            proxy_extension=self.__pluginfile__ if has_proxy_auth else "",
+            debugger_address=debugger_address,
+        )
+
+        # Running chrome of this profile will be reused: don't kill it
+        self.__reattach__ = bool(debugger_address) and self.__is_debugger_running__() \
+            and self.__is_own_debugger__()
+        if self.__reattach__:
+            start_killing = False
+
         # Kill chrome from terminal
         if start_killing:
             print("\nTry to kill chrome...")
-            windows = 'taskkill /IM "chrome.exe" /F > nul 2>&1'
-            linux = "pkill -9 -f chrome > /dev/null 2>&1"
-
-            if os.name == "nt":
-                os.system(windows)
-            else:
-                os.system(linux)
+            self.__kill_chrome__(kill_all=kill_all_chrome)
             print("Ok\n")
 
         # Create and instance of the web browser
@@ -143,112 +206,174 @@ class WebScraping ():
         os.environ['WDM_LOG_LEVEL'] = '0'
         os.environ['WDM_PRINT_FIRST_LINE'] = 'False'
 
-        # Configure browser
-        if not WebScraping.options:
-
-            WebScraping.options = webdriver.ChromeOptions()
-            WebScraping.options.add_argument('--no-sandbox')
-            WebScraping.options.add_argument('--start-maximized')
-            WebScraping.options.add_argument('--output=/dev/null')
-            WebScraping.options.add_argument('--log-level=3')
-            WebScraping.options.add_argument("--disable-notifications")
-            WebScraping.options.add_argument("--disable-infobars")
-            WebScraping.options.add_argument("--safebrowsing-disable-download-protection")
-
-            WebScraping.options.add_argument("--disable-dev-shm-usage")
-            WebScraping.options.add_argument("--disable-renderer-backgrounding")
-            WebScraping.options.add_argument("--disable-background-timer-throttling")
-            WebScraping.options.add_argument("--disable-backgrounding-occluded-windows")
-            WebScraping.options.add_argument("--disable-client-side-phishing-detection")
-            WebScraping.options.add_argument("--disable-crash-reporter")
-            WebScraping.options.add_argument("--disable-oopr-debug-crash-dump")
-            WebScraping.options.add_argument("--no-crash-upload")
-            WebScraping.options.add_argument("--disable-gpu")
-            WebScraping.options.add_argument("--disable-extensions")
-            WebScraping.options.add_argument("--disable-low-res-tiling")
-            WebScraping.options.add_argument("--log-level=3")
-            WebScraping.options.add_argument("--silent")
-
-            ''' Hardcoded for testing purposes '''
-            WebScraping.options.add_experimental_option("detach", True)
-
-            # Experimentals
-            if self.__experimentals__:
-                WebScraping.options.add_experimental_option(
-                    'excludeSwitches', ['enable-logging', "enable-automation"])
-                WebScraping.options.add_experimental_option('useAutomationExtension', False)
-
-            # screen size
-            WebScraping.options.add_argument(f"--window-size={self.__width__},{self.__height__}")
-
-            # headless mode
-            if self.__headless__:
-                WebScraping.options.add_argument("--headless=new")
-
-            if self.__mute__:
-                WebScraping.options.add_argument("--mute-audio")
-
-            # Set chrome folder
-            if self.__chrome_folder__:
-                WebScraping.options.add_argument(f"--user-data-dir={self.__chrome_folder__}")
-
-            # Set default user agent
-            if self.__user_agent__:
-                WebScraping.options.add_argument
-                \
-                '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                \
-                '(KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36'
-
-            if self.__download_folder__:
-                prefs = {"download.default_directory": f"{self.__download_folder__}",
-                         "download.prompt_for_download": "false",
-                         'profile.default_content_setting_values.automatic_downloads': 1,
-                         'profile.default_content_settings.popups': 0,
-                         "download.directory_upgrade": True,
-                         "plugins.always_open_pdf_externally": True,
-                         "plugins.plugins_list": [{"enabled": False, "name": "Chrome PDF Viewer"}],
-                         'download.extensions_to_open': 'xml',
-                         'safebrowsing.enabled': True
-                         }
-
-                WebScraping.options.add_experimental_option("prefs", prefs)
-
-            if self.__extensions__:
-                for extension in self.__extensions__:
-                    WebScraping.options.add_extension(extension)
-
-            if self.__incognito__:
-                WebScraping.options.add_argument("--incognito")
-
-            if self.__experimentals__:
-                WebScraping.options.add_argument(
-                    "--disable-blink-features=AutomationControlled")
-
-        # Set proxy without autentication
-        if (self.__proxy_server__ and self.__proxy_port__
-                and not self.__proxy_user__ and not self.__proxy_pass__):
-
-            proxy = f"{self.__proxy_server__}:{self.__proxy_port__}"
-            WebScraping.options.add_argument(f"--proxy-server={proxy}")
-
-        # Set proxy with autentification
-        # seleniumwire_options = {}
-        if (self.__proxy_server__ and self.__proxy_port__
-                and self.__proxy_user__ and self.__proxy_pass__):
-
+        # Proxy with autentication (extension with the credentials)
+        if self.launch_config.proxy_extension:
             self.__create_proxy_extesion__()
-            WebScraping.options.add_extension(self.__pluginfile__)
 
-        # Autoinstall driver with selenium
-        if not WebScraping.service:
-            WebScraping.service = Service()
+        # New options for each launch
+        options = self.launch_config.build_options(reattach=self.__reattach__)
 
-        # Auto download driver
-        self.driver = webdriver.Chrome(
-            service=WebScraping.service,
-            options=WebScraping.options
-        )
+        # Autoinstall driver with selenium (or use the pinned / cached one)
+        self.service = Service(executable_path=self.__get_driver_path__())
+
+        with latency.timer("browser.start"):
+            try:
+                self.driver = webdriver.Chrome(
+                    service=self.service,
+                    options=options
+                )
+            except Exception:
+                # Cached driver outdated (chrome updated): resolve it again
+                if not self.__fast_start__ or not os.path.exists(self.__driver_cache__):
+                    raise
+                os.remove(self.__driver_cache__)
+                WebScraping.driver_path = None
+                self.service = Service()
+                self.driver = webdriver.Chrome(
+                    service=self.service,
+                    options=options
+                )
+
+        # Save driver found by selenium (for the next launches)
+        WebScraping.driver_path = self.service.path
+        if self.__fast_start__:
+            with open(self.__driver_cache__, "w") as file:
+                file.write(self.service.path)
+
+        # Keep only one tab of the reused chrome
+        if self.__reattach__:
+            tabs = self.driver.window_handles
+            for tab in tabs[1:]:
+                self.driver.switch_to.window(tab)
+                self.driver.close()
+            self.driver.switch_to.window(tabs[0])
+
+        self.__time_driver_commands__()
+
+    def __kill_chrome__(self, kill_all: bool = False):
+        """
+        Kill the chrome processes of this instance profile (all the chrome
+        processes if there is no profile folder)
+
+        Args:
+            kill_all (bool, optional): kill all the chrome processes. Defaults to False.
+        """
+
+        if kill_all or not self.__chrome_folder__:
+            windows = 'taskkill /IM "chrome.exe" /F > nul 2>&1'
+            linux = "pkill -9 -f chrome > /dev/null 2>&1"
+        else:
+            # Only processes started with this exact user data dir (quoted in
+            # windows): the argument must end after the folder, so the
+            # "<folder>-standby" or "bot10" profiles are not killed
+            folder = "".join(
+                f"\\{char}" if char in ".^$*+?()[]{}|\\" else char
+                for char in self.__chrome_folder__
+            )
+            windows = 'powershell -NoProfile -Command "Get-CimInstance Win32_Process | ' \
+                      "Where-Object { $_.Name -eq 'chrome.exe' -and " \
+                      f"$_.CommandLine -match '--user-data-dir=\\x22?{folder}\\x22?( |$)' }} | " \
+                      'ForEach-Object { Stop-Process -Id $_.ProcessId -Force }" > nul 2>&1'
+            linux = f"pkill -9 -f -- '--user-data-dir={folder}( |$)' > /dev/null 2>&1"
+
+        if os.name == "nt":
+            os.system(windows)
+        else:
+            os.system(linux)
+
+    def restart_browser(self):
+        """
+        End the browser (even if it crashed), kill the chrome processes of
+        its profile and open it again
+        """
+
+        try:
+            self.end_browser()
+        except Exception:
+            self.driver = None
+        self.__kill_chrome__()
+        self.__reattach__ = False
+        self.__set_browser_instance__()
+
+    def __get_driver_path__(self) -> str:
+        """ Return the pinned chromedriver path, the one found in the first
+        launch, or the cached one in fast start mode
+
+        Returns:
+            str: chromedriver path, or None to resolve it with selenium
+        """
+
+        if self.__driver_path__:
+            return self.__driver_path__
+
+        if WebScraping.driver_path:
+            return WebScraping.driver_path
+
+        if self.__fast_start__ and os.path.exists(self.__driver_cache__):
+            with open(self.__driver_cache__, "r") as file:
+                driver_path = file.read().strip()
+            if os.path.exists(driver_path):
+                return driver_path
+
+        return None
+
+    def __is_debugger_running__(self) -> bool:
+        """ Check if a chrome is listening in the debugger address
+
+        Returns:
+            bool: True if the debugging port is open
+        """
+
+        host, port = self.__debugger_address__.rsplit(":", 1)
+        try:
+            with socket.create_connection((host, int(port)), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def __is_own_debugger__(self) -> bool:
+        """ Check if the chrome in the debugger address uses the profile of
+        this instance (chrome saves its debugging port in the profile)
+
+        Returns:
+            bool: True if the debugging port is the one of the profile
+        """
+
+        if not self.__chrome_folder__:
+            return False
+
+        port_path = os.path.join(self.__chrome_folder__, "DevToolsActivePort")
+        try:
+            with open(port_path) as file:
+                active_port = file.readline().strip()
+        except OSError:
+            return False
+
+        return active_port == self.__debugger_address__.rsplit(":", 1)[1]
+
+    def __time_driver_commands__(self):
+        """
+        Save the duration of each driver command in the latency tracker
+        """
+
+        execute = self.driver.execute
+
+        def timed_execute(driver_command, params=None):
+            with latency.timer(f"driver.{driver_command}"):
+                response = execute(driver_command, params)
+
+            # Track current tab for the devtools channels
+            if driver_command == "switchToWindow":
+                self.current_handle = params["handle"]
+            elif driver_command == "close":
+                channel = self.cdp_channels.pop(self.current_handle, None)
+                if channel:
+                    channel.close()
+                self.current_handle = None
+
+            return response
+
+        self.driver.execute = timed_execute
 
     def __create_proxy_extesion__(self):
         """Create a proxy chrome extension"""
@@ -312,6 +437,11 @@ class WebScraping ():
             zp.writestr("background.js", background_js)
 
     def end_browser(self):
+        for channel in self.cdp_channels.values():
+            channel.close()
+        self.cdp_channels = {}
+        self.current_handle = None
+
         if self.driver is not None:
             self.driver.quit()
             self.driver = None
@@ -376,8 +506,7 @@ class WebScraping ():
     def handle_browser_error(self, error):
         if "Selenium session deleted" in str(error):
             self.logger.error(f"Browser instance crashed: {error}")
-            self.end_browser()
-            self.__set_browser_instance__()
+            self.restart_browser()
         elif "connection refused" in str(error):
             self.logger.error(f"Connection refused error: {error}")
         else:
@@ -387,8 +516,7 @@ class WebScraping ():
         """
         Close the current instance of the web browser and reload in the same page
         """
-        self.end_browser()
-        self.__set_browser_instance__()
+        self.restart_browser()
         self.driver.get(self.__web_page__)
 
     def get_browser(self):
@@ -492,6 +620,157 @@ class WebScraping ():
             self.logger.error(f"Timed out: Element '{selector}' is still on the page.")
             raise
 
+    def wait_for_selector(self, selector: str, time_out: float = 10,
+                          poll_time: float = 0.01) -> bool:
+        """
+        Wait for an element to be in the page, checking every few milliseconds.
+
+        Args:
+            selector (str): CSS selector for the element to wait for.
+            time_out (float, optional): Maximum time to wait in seconds. Defaults to 10.
+            poll_time (float, optional): Seconds between checks. Defaults to 0.01.
+
+        Returns:
+            bool: True if the element was found, False if timed out.
+        """
+        try:
+            WebDriverWait(self.driver, time_out, poll_frequency=poll_time).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+            return True
+        except TimeoutException:
+            self.logger.error(f"Timed out: Element '{selector}' not found on the page.")
+            return False
+
+    def wait_for_visible(self, selector: str, time_out: float = 10,
+                         poll_time: float = 0.01) -> bool:
+        """
+        Wait for an element to be visible, checking every few milliseconds.
+
+        Args:
+            selector (str): CSS selector for the element to wait for.
+            time_out (float, optional): Maximum time to wait in seconds. Defaults to 10.
+            poll_time (float, optional): Seconds between checks. Defaults to 0.01.
+
+        Returns:
+            bool: True if the element is visible, False if timed out.
+        """
+        try:
+            WebDriverWait(self.driver, time_out, poll_frequency=poll_time).until(
+                EC.visibility_of_element_located((By.CSS_SELECTOR, selector))
+            )
+            return True
+        except TimeoutException:
+            self.logger.error(f"Timed out: Element '{selector}' not visible on the page.")
+            return False
+
+    def wait_for_dom_change(self, selector: str = "body", time_out: float = 10,
+                            click_selectors: list = [], settle_time: float = 0) -> bool:
+        """
+        Wait for the first change (nodes, attributes or text) inside an element,
+        using a MutationObserver in the page.
+
+        Args:
+            selector (str, optional): CSS selector of the element to observe. Defaults to "body".
+            time_out (float, optional): Maximum time to wait in seconds. Defaults to 10.
+            click_selectors (list, optional): CSS selectors of elements to click (in order)
+                after the observer starts, to don't miss the changes they cause. Defaults to [].
+            settle_time (float, optional): Seconds without new changes to wait after the
+                first one (to wait for the end of re-renders). Defaults to 0.
+
+        Returns:
+            bool: True if the element changed, False if timed out or not found.
+        """
+        script = """
+            const done = arguments[arguments.length - 1];
+            const elem = document.querySelector(arguments[0]);
+            if (!elem) {
+                done(false);
+                return;
+            }
+            const settleTime = arguments[3];
+            let settleTimer = null;
+            const finish = (changed) => {
+                observer.disconnect();
+                clearTimeout(timeOut);
+                clearTimeout(settleTimer);
+                done(changed);
+            };
+            const observer = new MutationObserver(() => {
+                clearTimeout(settleTimer);
+                settleTimer = setTimeout(() => finish(true), settleTime);
+            });
+            observer.observe(elem, {
+                childList: true, subtree: true, attributes: true, characterData: true
+            });
+            const timeOut = setTimeout(() => finish(false), arguments[1]);
+            for (const clickSelector of arguments[2]) {
+                const clickElem = document.querySelector(clickSelector);
+                if (clickElem) {
+                    clickElem.click();
+                }
+            }
+        """
+        try:
+            self.driver.set_script_timeout(time_out + settle_time + 1)
+            changed = self.driver.execute_async_script(
+                script, selector, int(time_out * 1000), click_selectors, int(settle_time * 1000))
+        except TimeoutException:
+            changed = False
+
+        if not changed:
+            self.logger.error(f"Timed out: Element '{selector}' didn't change.")
+        return changed
+
+    def wait_for_network_idle(self, idle_time: float = 0.5, time_out: float = 10) -> bool:
+        """
+        Wait until the page is loaded and no new resources are requested
+        during the idle time.
+
+        Args:
+            idle_time (float, optional): Seconds without new requests. Defaults to 0.5.
+            time_out (float, optional): Maximum time to wait in seconds. Defaults to 10.
+
+        Returns:
+            bool: True if the network is idle, False if timed out.
+        """
+        script = """
+            const done = arguments[arguments.length - 1];
+            const idleTime = arguments[0];
+            const timeOut = arguments[1];
+            const start = performance.now();
+            let requests = -1;
+            let lastChange = start;
+
+            const check = () => {
+                const now = performance.now();
+                const current = performance.getEntriesByType('resource').length;
+                if (current !== requests) {
+                    requests = current;
+                    lastChange = now;
+                }
+                const loaded = document.readyState === 'complete';
+                if (loaded && now - lastChange >= idleTime) {
+                    done(true);
+                } else if (now - start >= timeOut) {
+                    done(false);
+                } else {
+                    setTimeout(check, 20);
+                }
+            };
+            check();
+        """
+        try:
+            self.driver.set_script_timeout(time_out + 1)
+            idle = self.driver.execute_async_script(
+                script, int(idle_time * 1000), int(time_out * 1000))
+        except TimeoutException:
+            idle = False
+
+        if not idle:
+            self.logger.error("Timed out: Network is still busy.")
+        return idle
+
     def get_text(self, selector, item: str = None):
         """
         Return text for a specific element on the page.
@@ -740,6 +1019,10 @@ class WebScraping ():
             if time_out > 0:
                 self.driver.set_page_load_timeout(time_out)
 
+            # Block not needed resources of the site
+            if self.__block_rules__:
+                self.block_requests(web_page)
+
             # Load the web page
             self.driver.get(self.__web_page__)
 
@@ -759,6 +1042,99 @@ class WebScraping ():
                 except Exception as e:
                     self.logger.error(f"Error opening page: {e}")
 
+    def get_blocked_urls(self, web_page: str) -> list:
+        """ Return the url patterns to block in a page, from the block rules
+
+        Args:
+            web_page (str): page url
+
+        Returns:
+            list: url patterns to block (without the ones inside an allowed
+                pattern; wider block patterns are kept)
+        """
+
+        host = urlparse(web_page).hostname or ""
+        blocked_urls = []
+        allowed_urls = []
+        for site, rules in self.__block_rules__.items():
+            if site == "*" or host == site or host.endswith(f".{site}"):
+                blocked_urls += rules.get("block", [])
+                allowed_urls += rules.get("allow", [])
+
+        return [
+            url for url in blocked_urls
+            if not any(fnmatchcase(url, allowed) for allowed in allowed_urls)
+        ]
+
+    def __check_block_rules__(self):
+        """ Warn about the allowed patterns narrower than a block pattern of
+        their sites: CDP can't exempt them, so their urls stay blocked
+        """
+
+        for site, rules in self.__block_rules__.items():
+            for allowed in rules.get("allow", []):
+                for blocked_site, blocked_rules in self.__block_rules__.items():
+                    if site != "*" and blocked_site not in ("*", site):
+                        continue
+                    for blocked in blocked_rules.get("block", []):
+                        if fnmatchcase(allowed, blocked) and not fnmatchcase(blocked, allowed):
+                            self.logger.warning(
+                                f"Allowed urls '{allowed}' ({site}) stay blocked by "
+                                f"'{blocked}' ({blocked_site}): remove or narrow the block pattern"
+                            )
+
+    def block_requests(self, web_page: str):
+        """ Block the not needed requests (images, fonts, media, analytics...)
+        of the current tab, before loading the page
+
+        Args:
+            web_page (str): page url to load
+        """
+
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {
+                "urls": self.get_blocked_urls(web_page)
+            })
+        except Exception as e:
+            self.logger.error(f"Failed to block requests: {e}")
+
+    def run_script(self, script: str, *args):
+        """ Run a hot path script (with execute_script syntax and json
+        arguments), through the devtools websocket of the tab if cdp_scripts
+        is enabled, or with selenium if not
+
+        Args:
+            script (str): js code (with "return" to get values)
+            args: script arguments (available in js "arguments")
+
+        Returns:
+            any: script value
+        """
+
+        if not self.__cdp_scripts__:
+            return self.driver.execute_script(script, *args)
+
+        if not self.current_handle:
+            self.current_handle = self.driver.current_window_handle
+        handle = self.current_handle
+
+        try:
+            channel = self.cdp_channels.get(handle)
+            if not channel:
+                address = self.driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+                channel = CdpChannel(address, handle.replace("CDwindow-", ""))
+                self.cdp_channels[handle] = channel
+            return channel.call_function(f"function () {{ {script} }}", *args)
+
+        # Websocket lost: use selenium (and connect again in the next script)
+        except (websocket.WebSocketException, OSError) as e:
+            self.logger.error(f"Devtools channel failed: {e}")
+            channel = self.cdp_channels.pop(handle, None)
+            if channel:
+                channel.close()
+            return self.driver.execute_script(script, *args)
+
     def set_page_js(self, web_page, new_tab=False):
         """
         Open a web page using JavaScript, either in the current tab or a new tab.
@@ -948,6 +1324,15 @@ class WebScraping ():
         windows = self.driver.window_handles
         self.driver.switch_to.window(windows[number])
 
+    def switch_to_handle(self, handle: str):
+        """
+        Switch to a specific tab by its window handle.
+
+        Args:
+            handle (str): Window handle of the tab to switch to.
+        """
+        self.driver.switch_to.window(handle)
+
     def refresh_selenium(self, time_units=1, back_tab=0):
         """
         Refresh the Selenium data by creating and closing a new tab.
@@ -996,7 +1381,7 @@ class WebScraping ():
         """
         try:
             script = f"document.body.style.zoom='{percentage}%'"
-            self.driver.execute_script(script)
+            self.run_script(script)
         except Exception as e:
             self.logger.error(f"Failed to adjust page zoom: {e}")
 